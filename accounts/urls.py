@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("dashboard/", views.dashboard, name="fee_dashboard"),  # Bursar's fee-collection overview
+]
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_control
+
+from payments import verification
+from payments.models import FeeCollectionRollup
+from school_portal.ratelimit import ratelimit
+
+
+# ===========================================
+# FEE-COLLECTION DASHBOARD
+# ===========================================
+@staff_member_required
+def dashboard(request):
+    # ✅ Reads only the pre-aggregated rollup rows, never the payments table
+    sessions = sorted(
+        set(FeeCollectionRollup.objects.values_list("session", flat=True)), reverse=True
+    )
+    session = request.GET.get("session") or (sessions[0] if sessions else "")
+
+    rows = FeeCollectionRollup.objects.filter(session=session, payment_count__gt=0).values(
+        "term", "student_class", "status", "payment_count", "total_amount"
+    )
+
+    terms = set()
+    by_class = defaultdict(lambda: defaultdict(Decimal))
+    by_term = defaultdict(Decimal)
+    collected, paid_count = Decimal("0"), 0
+    pending, pending_count = Decimal("0"), 0
+
+    for row in rows:
+        terms.add(row["term"])
+        if row["status"] == "successful":
+            by_class[row["student_class"]][row["term"]] += row["total_amount"]
+            by_term[row["term"]] += row["total_amount"]
+            collected += row["total_amount"]
+            paid_count += row["payment_count"]
+        elif row["status"] == "pending":
+            pending += row["total_amount"]
+            pending_count += row["payment_count"]
+
+    terms = sorted(terms)
+    class_rows = [
+        {
+            "student_class": student_class,
+            "amounts": [totals.get(term, Decimal("0")) for term in terms],
+            "total": sum(totals.values(), Decimal("0")),
+        }
+        for student_class, totals in sorted(by_class.items())
+    ]
+
+    context = {
+        "sessions": sessions,
+        "session": session,
+        "terms": terms,
+        "term_totals": [by_term.get(term, Decimal("0")) for term in terms],
+        "class_rows": class_rows,
+        "collected": collected,
+        "paid_count": paid_count,
+        "pending": pending,
+        "pending_count": pending_count,
+    }
+    return render(request, "accounts/dashboard.html", context)
+
+
+# ===========================================
+# RECEIPT VERIFICATION (QR code scans)
+# ===========================================
+@ratelimit("receipt-verify")
+@cache_control(private=True, max_age=60)
+def verify_receipt(request, token):
+    # ✅ Signed token -> primary-key lookup, served from the cache; no PDF is rendered
+    pk = verification.payment_id(token)
+    payment = verification.summary(pk) if pk is not None else None
+    status = 200 if payment is not None else 404
+
+    if request.GET.get("format") == "json" or "application/json" in request.headers.get("Accept", ""):
+        response = JsonResponse({"valid": payment is not None, "payment": payment}, status=status)
+    else:
+        response = render(request, "accounts/verify_receipt.html", {"payment": payment}, status=status)
+    patch_vary_headers(response, ["Accept"])
+    return response
@@ -0,0 +1,160 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway copy of the configured database (the
+same test database Django's test runner would create) and a throwaway
+cache directory, never against the real ones. Run them from the project root, e.g.::
+
+    python -m benchmarks.admin_changelist --rows 200000
+"""
+import contextlib
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "school_portal.settings")
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def scratch_cache():
+    """
+    Point the cache at a temporary directory for the duration of the block.
+
+    Cache keys such as ``receipt-verify:<pk>`` are per row, and scratch
+    pks overlap with the dev database's, so benchmarks must never share the
+    developer's cache. The environment variables carry the same cache to
+    servers the benchmark starts as subprocesses.
+    """
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    saved = {name: os.environ.get(name) for name in ("CACHE_BACKEND", "CACHE_DIR")}
+    os.environ.update(CACHE_BACKEND="file", CACHE_DIR=cache_dir)
+    default = {
+        **settings.CACHES["default"],
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": cache_dir,
+    }
+    try:
+        with override_settings(CACHES={"default": default}):
+            yield cache_dir
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Create a scratch database (and a scratch cache) for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    scratch_dir = None
+    if connection.vendor == "sqlite":
+        # An on-disk file, so numbers include real I/O rather than :memory:.
+        scratch_dir = tempfile.mkdtemp(prefix="bench-")
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(scratch_dir, "bench.sqlite3")
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with scratch_cache():
+            yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if scratch_dir:
+            with contextlib.suppress(OSError):
+                os.rmdir(scratch_dir)
+
+
+SESSIONS = ["2024/2025", "2025/2026", "2026/2027"]
+TERMS = ["First Term", "Second Term", "Third Term"]
+CLASSES = [f"{level} {n}" for level in ("Primary", "JSS", "SSS") for n in range(1, 7) if level == "Primary" or n <= 3]
+STATUSES = ["successful"] * 8 + ["pending", "failed"]
+
+
+def seed_payments(count, batch_size=5000, seed=1234, start=0):
+    """
+    Bulk-insert ``count`` realistic payments spread over the last few years, numbered from ``start``.
+
+    ``bulk_create`` sends no signals, so the fee-collection rollup is rebuilt
+    afterwards; otherwise the admin's totals and filters would read it empty.
+    """
+    from django.utils import timezone
+
+    from payments import rollup
+    from payments.models import Payment
+
+    rng = random.Random(seed)
+    date_field = Payment._meta.get_field("date")
+    now = timezone.now()
+
+    # auto_now_add would stamp every row with "now"; spread them out instead.
+    date_field.auto_now_add = False
+    try:
+        for first in range(start, start + count, batch_size):
+            rows = []
+            for i in range(first, min(first + batch_size, start + count)):
+                rows.append(Payment(
+                    student_name=f"Student {i} {rng.choice(['Okafor', 'Adeyemi', 'Bello', 'Eze', 'Musa'])}",
+                    student_class=rng.choice(CLASSES),
+                    session=rng.choice(SESSIONS),
+                    term=rng.choice(TERMS),
+                    parent_email=f"parent{i}@example.com",
+                    amount=Decimal(rng.choice([25000, 45000, 60000, 85000])),
+                    payment_reference=f"TX-BENCH-{i:08d}",
+                    status=rng.choice(STATUSES),
+                    date=now - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)),
+                ))
+            Payment.objects.bulk_create(rows, batch_size=batch_size)
+    finally:
+        date_field.auto_now_add = True
+    rollup.rebuild()
+
+
+def summarize(samples):
+    """Return mean/p50/p95/p99 (in milliseconds) for a list of second samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0}
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(pct(50), 2),
+        "p95_ms": round(pct(95), 2),
+        "p99_ms": round(pct(99), 2),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
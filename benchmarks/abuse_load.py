@@ -0,0 +1,178 @@
+"""
+Parent payment flows under abuse, with and without rate limiting and the
+gateway in-flight cap.
+
+Serves the WSGI application from a fixed pool of ``--threads`` request
+threads (like one gunicorn gthread worker) against the stub gateway, and
+runs the normal parent flows while ``--bots`` clients, each from one
+address, repeat an attack cycle -- confirm -> initialize (a new pending
+payment and checkout every time) plus a verify with an unknown transaction
+id -- ``--bot-rate`` times a second over ``--bot-connections`` connections,
+whatever the responses. Parents start after ``--warmup`` seconds of
+attack. The flows are run three times:
+
+    baseline     no bots, for reference
+    unprotected  RATE_LIMIT_ENABLED=False, FLW_MAX_IN_FLIGHT=0
+    protected    the configured RATE_LIMITS, FLW_MAX_IN_FLIGHT=--max-in-flight
+
+and reports parent latency per step (p50/p95/p99), the bots' responses by
+status code, gateway calls and payment rows created:
+
+    python -m benchmarks.abuse_load --parents 6 --iterations 10 --bots 12 --threads 8 --gateway-latency-ms 300
+"""
+import argparse
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks._support import benchmark_database, setup_django, summarize
+from benchmarks.payment_flow import (
+    STEPS, WEBHOOK_SECRET, Recorder, _QuietHandler, _ThreadingWSGIServer, run_flow,
+)
+from benchmarks.stub_gateway import StubGateway
+
+
+class _PooledWSGIServer(_ThreadingWSGIServer):
+    """A fixed number of request threads, like a gunicorn gthread worker: extra requests queue."""
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def bot(base, ident, stop, outcomes, lock, interval):
+    session = requests.Session()
+    session.headers["X-Forwarded-For"] = f"203.0.113.{ident}"
+    fields = {
+        "student_name": f"Bot {ident}", "session": "2025/2026", "student_class": "Primary 1",
+        "term": "First Term", "parent_email": f"bot{ident}@example.com", "amount": "1000",
+    }
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            form = session.get(f"{base}/payments/pay/")
+            token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', form.text)
+            responses = [form, session.post(f"{base}/payments/pay/", headers={"Referer": f"{base}/payments/pay/"},
+                                             data={**fields, "csrfmiddlewaretoken": token.group(1) if token else ""})]
+            responses.append(session.post(f"{base}/payments/initialize/", allow_redirects=False))
+            responses.append(session.get(f"{base}/payments/verify/", params={"transaction_id": "999999"}))
+        except requests.RequestException:
+            responses = []
+            with lock:
+                outcomes["connection error"] += 1
+        with lock:
+            for response in responses:
+                outcomes[response.status_code] += 1
+        stop.wait(interval - (time.perf_counter() - started))
+
+
+def run_phase(name, args, stub, limited, bots=None):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.wsgi import get_wsgi_application
+
+    from payments import gateway
+    from payments.models import Payment
+
+    settings.RATE_LIMIT_ENABLED = limited
+    settings.FLW_MAX_IN_FLIGHT = args.max_in_flight if limited else 0
+    gateway.reset_client()
+    cache.clear()
+
+    server = _PooledWSGIServer(("127.0.0.1", 0), _QuietHandler, threads=args.threads)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    rows_before, calls_before = Payment.objects.count(), stub.requests
+    stop, lock, outcomes = threading.Event(), threading.Lock(), Counter()
+    bots = args.bots if bots is None else bots
+    interval = args.bot_connections / args.bot_rate
+    attackers = [threading.Thread(target=bot, args=(base, n, stop, outcomes, lock, interval), daemon=True)
+                 for n in range(bots) for _ in range(args.bot_connections)]
+    for thread in attackers:
+        thread.start()
+    if attackers:
+        # Measure the steady state of an ongoing attack, not the bots' first burst
+        time.sleep(args.warmup)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parents) as pool:
+        futures = [
+            # Every parent is on their own address, like real households
+            pool.submit(run_flow, base, stub, recorder, user, iteration,
+                        {"X-Forwarded-For": f"10.0.{user}.{iteration}"})
+            for user in range(args.parents)
+            for iteration in range(args.iterations)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for thread in attackers:
+        thread.join()
+    server.shutdown()
+    server.server_close()
+
+    print(f"\n{name}: {args.parents * args.iterations} parent flows in {elapsed:.1f} s "
+          f"alongside {bots} bots")
+    print(f"  {'step':<11} {'p50':>8} {'p95':>8} {'p99':>8}  errors")
+    for step in STEPS:
+        stats = summarize(recorder.samples[step])
+        if not stats.get("n"):
+            print(f"  {step:<11} (no samples)  errors {recorder.errors[step]}")
+            continue
+        print(f"  {step:<11} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}  "
+              f"{recorder.errors[step]}")
+    if outcomes:
+        print(f"  bot responses: {', '.join(f'{code}: {n}' for code, n in sorted(outcomes.items(), key=str))}")
+    print(f"  gateway calls: {stub.requests - calls_before}, payment rows created: "
+          f"{Payment.objects.count() - rows_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parents", type=int, default=6, help="Concurrent well-behaved parents.")
+    parser.add_argument("--iterations", type=int, default=10, help="Flows per parent.")
+    parser.add_argument("--bots", type=int, default=12)
+    parser.add_argument("--bot-rate", type=float, default=2.0, help="Attack cycles per second each bot tries to send.")
+    parser.add_argument("--bot-connections", type=int, default=2, help="Concurrent connections per bot.")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds the bots run before parents start.")
+    parser.add_argument("--threads", type=int, default=8, help="Request threads serving the app.")
+    parser.add_argument("--gateway-latency-ms", type=float, default=300.0)
+    parser.add_argument("--max-in-flight", type=int, default=6, help="FLW_MAX_IN_FLIGHT for the protected run.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    with StubGateway(latency=args.gateway_latency_ms / 1000) as stub, benchmark_database(), \
+            tempfile.TemporaryDirectory() as receipts:
+        settings.RECEIPT_CACHE_DIR = receipts
+        settings.FLW_BASE_URL = stub.base_url
+        settings.FLW_SECRET_HASH = WEBHOOK_SECRET
+        settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+        settings.ALLOWED_HOSTS = ["*"]
+        settings.DEBUG = False
+
+        run_phase("baseline (no attack)", args, stub, limited=True, bots=0)
+        run_phase("unprotected", args, stub, limited=False)
+        run_phase("protected", args, stub, limited=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Payment admin changelist latency, before and after the changelist indexes.
+
+Seeds a scratch database with ``--rows`` payments, then times a set of
+typical changelist URLs twice: once with the ``Payment.Meta.indexes``
+dropped and the stock paginator/full result count ("before"), and once
+with the indexes and ``EstimatedCountPaginator`` in place ("after").
+
+    python -m benchmarks.admin_changelist --rows 300000 --repeat 20
+"""
+import argparse
+import json
+
+from benchmarks._support import benchmark_database, seed_payments, setup_django, summarize, timed
+
+URLS = [
+    ("first page", ""),
+    ("deep page", "?p=200"),
+    ("status", "?status__exact=successful"),
+    ("session+term", "?session__exact=2025%2F2026&term__exact=First+Term"),
+    ("session+term+class", "?session__exact=2025%2F2026&term__exact=First+Term&student_class__exact=JSS+1"),
+    ("class+status", "?student_class__exact=Primary+3&status__exact=pending"),
+]
+
+
+def run(client, repeat):
+    results = {}
+    for label, query in URLS:
+        url = f"/admin/payments/payment/{query}"
+        client.get(url)  # warm caches
+        results[label] = summarize(timed(lambda: client.get(url), repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results only.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.paginator import Paginator
+    from django.test import Client
+
+    from payments.admin import PaymentAdmin
+    from payments.models import Payment
+
+    with benchmark_database() as connection:
+        seed_payments(args.rows)
+        user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+        client = Client()
+        client.force_login(user)
+
+        indexes = Payment._meta.indexes
+        paginator, full_count = PaymentAdmin.paginator, PaymentAdmin.show_full_result_count
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Payment, index)
+        PaymentAdmin.paginator, PaymentAdmin.show_full_result_count = Paginator, True
+        before = run(client, args.repeat)
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Payment, index)
+        PaymentAdmin.paginator, PaymentAdmin.show_full_result_count = paginator, full_count
+        after = run(client, args.repeat)
+
+    report = {"rows": args.rows, "vendor": connection.vendor, "before": before, "after": after}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.rows} payments on {connection.vendor}, {args.repeat} requests per URL (p50 / p95 ms)")
+    for label, _ in URLS:
+        b, a = before[label], after[label]
+        print(f"  {label:<20} before {b['p50_ms']:>8.1f} / {b['p95_ms']:>8.1f}   after {a['p50_ms']:>8.1f} / {a['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Admin payment search latency as the table grows: the stock ``icontains``
+search against the indexed one in ``payments.search``.
+
+Seeds a scratch database up to each of ``--rows`` in turn and times the
+changelist with a set of typical searches (p50 / p95 ms per request):
+
+    python -m benchmarks.admin_search --rows 100000 1000000 --repeat 10
+"""
+import argparse
+import time
+
+from benchmarks._support import benchmark_database, seed_payments, setup_django, summarize, timed
+
+SEARCHES = [
+    ("surname", "okafor"),
+    ("name", "Student 4821"),
+    ("email", "parent77@example"),
+    ("reference prefix", "TX-BENCH-0000123"),
+    ("no match", "zzzzzz"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib import admin
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from payments.admin import PaymentAdmin
+    from payments.models import Payment
+
+    indexed = PaymentAdmin.get_search_results
+    with benchmark_database() as connection:
+        user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+        client = Client()
+        client.force_login(user)
+
+        seeded = 0
+        for rows in sorted(args.rows):
+            started = time.perf_counter()
+            seed_payments(rows - seeded, seed=rows, start=seeded)
+            seeded = Payment.objects.count()
+            print(f"{seeded} payments on {connection.vendor} (seeded in {time.perf_counter() - started:.0f} s), "
+                  f"p50 / p95 ms")
+
+            for label, term in SEARCHES:
+                url = f"/admin/payments/payment/?q={term}"
+                results = {}
+                for mode, method in (("stock", admin.ModelAdmin.get_search_results), ("indexed", indexed)):
+                    PaymentAdmin.get_search_results = method
+                    client.get(url)  # warm caches
+                    results[mode] = summarize(timed(lambda: client.get(url), args.repeat))
+                PaymentAdmin.get_search_results = indexed
+                s, i = results["stock"], results["indexed"]
+                print(f"  {label:<17} stock {s['p50_ms']:>8.1f} / {s['p95_ms']:>8.1f}   "
+                      f"indexed {i['p50_ms']:>7.1f} / {i['p95_ms']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
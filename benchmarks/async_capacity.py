@@ -0,0 +1,181 @@
+"""
+Concurrent capacity of the gateway-bound payment steps: sync vs ASGI.
+
+Starts the stub Flutterwave API with ``--latency-ms`` per call and, for
+each mode, serves the app under gunicorn with ``--workers`` workers:
+
+    sync   sync workers running school_portal.wsgi (the current setup)
+    asgi   uvicorn workers running school_portal.asgi (async views)
+
+``--concurrency`` virtual parents then all go through the flow at once:
+pay form, confirm, initialize (one gateway call) and verify (one gateway
+call, as when the webhook has not arrived yet). A sync worker is busy for
+the whole gateway round-trip; an async worker is not.
+
+    python -m benchmarks.async_capacity --workers 2 --concurrency 200 --latency-ms 1000
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from benchmarks._support import ROOT, benchmark_database, setup_django, summarize
+from benchmarks.stub_gateway import StubGateway
+
+MODES = ["sync", "asgi"]
+
+
+# ===========================================
+# SERVER (child process)
+# ===========================================
+def serve(mode, db_name, port, workers, gateway_url):
+    from gunicorn.app.base import BaseApplication
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "school_portal.settings")
+    os.environ["FLW_BASE_URL"] = gateway_url
+    os.environ["ASYNC_PAYMENT_VIEWS"] = str(mode == "asgi")
+    # Capacity is the point here: no per-client limits or in-flight cap
+    os.environ["RATE_LIMIT_ENABLED"] = "False"
+    os.environ["FLW_MAX_IN_FLIGHT"] = "0"
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_name
+    application = importlib.import_module(f"school_portal.{'asgi' if mode == 'asgi' else 'wsgi'}").application
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn_worker.UvicornWorker" if mode == "asgi" else "sync")
+            self.cfg.set("backlog", 2048)
+            self.cfg.set("timeout", 120)
+            self.cfg.set("loglevel", "warning")
+
+        def load(self):
+            return application
+
+    Server().run()
+
+
+# ===========================================
+# LOAD (parent process)
+# ===========================================
+async def parent_flow(base, stub, index, mode, timings, errors):
+    email = f"{mode}-parent{index}@example.com"
+    async with httpx.AsyncClient(base_url=base, timeout=120, follow_redirects=False) as client:
+        try:
+            form = await client.get("/payments/pay/")
+            token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', form.text)
+            await client.post("/payments/pay/", data={
+                "csrfmiddlewaretoken": token.group(1) if token else "",
+                "student_name": f"Capacity Student {index}",
+                "session": "2025/2026",
+                "student_class": "Primary 3",
+                "term": "First Term",
+                "parent_email": email,
+                "amount": "45000",
+            })
+
+            started = time.perf_counter()
+            init = await client.post("/payments/initialize/")
+            timings["initialize"].append(time.perf_counter() - started)
+            if init.status_code != 302:
+                errors["initialize"] += 1
+                return
+            transaction_id = urlparse(init.headers["Location"]).path.rstrip("/").split("/")[-1]
+            tx_ref = stub.transactions[int(transaction_id)]["tx_ref"]
+
+            started = time.perf_counter()
+            verify = await client.get("/payments/verify/", params={
+                "status": "successful", "tx_ref": tx_ref, "transaction_id": transaction_id,
+            })
+            timings["verify"].append(time.perf_counter() - started)
+            if verify.status_code != 200 or "Payment Successful" not in verify.text:
+                errors["verify"] += 1
+        except httpx.HTTPError:
+            errors["transport"] += 1
+
+
+async def run_load(base, stub, concurrency, mode):
+    timings = {"initialize": [], "verify": []}
+    errors = {"initialize": 0, "verify": 0, "transport": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(parent_flow(base, stub, i, mode, timings, errors) for i in range(concurrency)))
+    return time.perf_counter() - started, timings, errors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(base, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if httpx.get(f"{base}/payments/about/", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base} did not come up within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=1000.0)
+    parser.add_argument("--serve", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--gateway", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.db, args.port, args.workers, args.gateway)
+
+    setup_django()
+    with StubGateway(latency=args.latency_ms / 1000) as stub, benchmark_database() as connection:
+        db_name = str(connection.settings_dict["NAME"])
+        print(f"{args.concurrency} concurrent parents, {args.workers} workers, "
+              f"gateway latency {args.latency_ms:.0f} ms, {connection.vendor}")
+        print(f"  {'mode':<5} {'flows/s':>8} {'ok':>5} {'errors':>7}  "
+              f"{'init p50':>9} {'init p95':>9} {'verify p50':>11} {'verify p95':>11}")
+
+        for mode in args.modes:
+            port = free_port()
+            base = f"http://127.0.0.1:{port}"
+            process = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.async_capacity", "--serve", mode, "--db", db_name,
+                 "--port", str(port), "--workers", str(args.workers), "--gateway", stub.base_url],
+                cwd=ROOT,
+            )
+            try:
+                wait_until_up(base, process)
+                elapsed, timings, errors = asyncio.run(run_load(base, stub, args.concurrency, mode))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+            init, verify = summarize(timings["initialize"]), summarize(timings["verify"])
+            ok = len(timings["verify"]) - errors["verify"]
+            print(f"  {mode:<5} {ok / elapsed:>8.1f} {ok:>5} {sum(errors.values()):>7}  "
+                  f"{init.get('p50_ms', 0):>8.0f}ms {init.get('p95_ms', 0):>8.0f}ms "
+                  f"{verify.get('p50_ms', 0):>10.0f}ms {verify.get('p95_ms', 0):>10.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Pages/sec for bulk receipt generation.
+
+Compares rendering ``--rows`` receipts one at a time with
+``render_receipt_pdf`` (what ``download_receipt`` does) against the batch
+engine in ``payments.receipt_batch``, as a ZIP and as one merged PDF, with
+one and with ``--workers`` processes.
+
+    python -m benchmarks.bulk_receipts --rows 2000 --workers 4
+"""
+import argparse
+import io
+import json
+import time
+
+from benchmarks._support import benchmark_database, seed_payments, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    setup_django()
+    from payments import receipt_batch
+    from payments.models import Payment
+    from payments.utils import render_receipt_pdf
+
+    workers = args.workers or receipt_batch.default_workers()
+    results = {}
+
+    with benchmark_database():
+        seed_payments(args.rows)
+        queryset = Payment.objects.order_by("pk")
+
+        def measure(label, fn):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            results[label] = {"seconds": round(elapsed, 2), "pages_per_sec": round(args.rows / elapsed, 1)}
+
+        measure("one at a time", lambda: [render_receipt_pdf(p) for p in queryset.iterator()])
+        for n in sorted({1, workers}):
+            measure(f"zip, {n} worker(s)", lambda: sum(
+                len(c) for c in receipt_batch.iter_zip(receipt_batch.iter_receipt_fields(queryset), workers=n)
+            ))
+            measure(f"merged pdf, {n} worker(s)", lambda: receipt_batch.write_merged_pdf(
+                receipt_batch.iter_receipt_fields(queryset), io.BytesIO(), workers=n
+            ))
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+        return
+    print(f"{args.rows} receipts")
+    for label, result in results.items():
+        print(f"  {label:<24} {result['seconds']:>7.2f} s  {result['pages_per_sec']:>8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Write throughput for concurrent ``Payment`` inserts.
+
+``--threads`` writers each create ``--rows`` pending payments the way
+``initialize_payment`` does (``update_or_create``, one transaction per
+row), against a scratch copy of the configured database. Run it once per
+backend to compare:
+
+    python -m benchmarks.concurrent_writes --threads 1 4 16
+    DATABASE_URL=postgres://... python -m benchmarks.concurrent_writes --threads 1 4 16
+
+On SQLite it also runs the stock settings (rollback journal, deferred
+transactions) next to the tuned ones from settings.py (WAL,
+synchronous=NORMAL, IMMEDIATE transactions, busy timeout).
+"""
+import argparse
+import threading
+import time
+from decimal import Decimal
+
+from benchmarks._support import benchmark_database, setup_django, summarize
+
+SQLITE_STOCK = {
+    "init_command": "PRAGMA journal_mode=DELETE; PRAGMA synchronous=FULL",
+    "transaction_mode": None,
+    "timeout": 5,
+}
+
+
+def writer(worker, rows, run, samples, errors, lock):
+    from django.db import DatabaseError, connection
+
+    from payments.models import Payment
+
+    local = []
+    failed = 0
+    try:
+        for i in range(rows):
+            started = time.perf_counter()
+            try:
+                Payment.objects.update_or_create(
+                    payment_reference=f"TX-WRITE-{run}-{worker}-{i}",
+                    defaults={
+                        "student_name": f"Writer {worker}",
+                        "student_class": "Primary 3",
+                        "session": "2025/2026",
+                        "term": "First Term",
+                        "parent_email": f"writer{worker}@example.com",
+                        "amount": Decimal("45000"),
+                        "status": "pending",
+                    },
+                )
+            except DatabaseError:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - started)
+    finally:
+        connection.close()  # hand the connection (or pool slot) back
+    with lock:
+        samples.extend(local)
+        errors[0] += failed
+
+
+def run(label, threads, rows):
+    samples, errors, lock = [], [0], threading.Lock()
+    workers = [
+        threading.Thread(target=writer, args=(w, rows, f"{label}-{threads}", samples, errors, lock))
+        for w in range(threads)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(samples)
+    print(f"  {label:<7} {threads:>3} threads: {len(samples) / elapsed:8.0f} inserts/s  "
+          f"p50 {stats.get('p50_ms', 0):6.1f} ms  p95 {stats.get('p95_ms', 0):7.1f} ms  "
+          f"p99 {stats.get('p99_ms', 0):7.1f} ms  errors {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--rows", type=int, default=200, help="Inserts per thread.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    with benchmark_database():
+        configs = [("tuned", None)]
+        if connection.vendor == "sqlite":
+            configs.insert(0, ("stock", SQLITE_STOCK))
+        pool = connection.settings_dict.get("OPTIONS", {}).get("pool")
+        print(f"{args.rows} inserts per thread on {connection.vendor}" + (f", pool {pool}" if pool else ""))
+
+        tuned = dict(connection.settings_dict["OPTIONS"])
+        for label, options in configs:
+            connection.close()
+            # Every writer thread opens its connection from this shared settings dict.
+            connection.settings_dict["OPTIONS"] = {**tuned, **(options or {})}
+            for threads in args.threads:
+                run(label, threads, args.rows)
+        connection.settings_dict["OPTIONS"] = tuned
+
+
+if __name__ == "__main__":
+    main()
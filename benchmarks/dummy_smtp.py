@@ -0,0 +1,69 @@
+"""
+Minimal SMTP sink for benchmarks: accepts every message and throws it away.
+
+Speaks just enough plain SMTP (no TLS/AUTH) for Django's SMTP backend.
+Point the app at it with ``EMAIL_HOST=127.0.0.1``, ``EMAIL_PORT=<port>``
+and ``EMAIL_USE_TLS=False``.
+"""
+import socketserver
+import threading
+
+
+class DummySMTPServer:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.messages = 0
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("220 dummy ESMTP ready")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode(errors="replace").strip().upper()
+                    if command.startswith("EHLO"):
+                        self.wfile.write(b"250-dummy\r\n250 8BITMIME\r\n")
+                    elif command.startswith("DATA"):
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        with sink._lock:
+                            sink.messages += 1
+                        self.reply("250 OK: queued")
+                    elif command.startswith("QUIT"):
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        # HELO, MAIL, RCPT, RSET, NOOP...
+                        self.reply("250 OK")
+
+        return Handler
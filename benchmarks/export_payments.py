@@ -0,0 +1,86 @@
+"""
+Throughput and memory of the admin payment export.
+
+Seeds ``--rows`` payments into a scratch database, requests the CSV export
+through the admin URL as a logged-in superuser and consumes the stream,
+reporting time to first byte, rows/sec and the peak RSS growth while
+exporting.
+
+    python -m benchmarks.export_payments --rows 500000
+"""
+import argparse
+import json
+import resource
+import time
+
+from benchmarks._support import benchmark_database, seed_payments, setup_django
+
+
+def current_rss_kb():
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except OSError:
+        # Not Linux: fall back to the (monotonic) peak.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    with benchmark_database() as connection:
+        seed_payments(args.rows)
+        user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+        client = Client()
+        client.force_login(user)
+
+        rss_start = rss_peak = current_rss_kb()
+        started = time.perf_counter()
+        response = client.get(f"/admin/payments/payment/export/{args.format}/")
+        stream = response.streaming_content if response.streaming else [response.content]
+
+        first_byte = None
+        size = lines = 0
+        for chunk in stream:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+            if lines % 10000 < 2:
+                rss_peak = max(rss_peak, current_rss_kb())
+        elapsed = time.perf_counter() - started
+        rss_peak = max(rss_peak, current_rss_kb())
+
+    report = {
+        "rows": args.rows,
+        "format": args.format,
+        "vendor": connection.vendor,
+        "status": response.status_code,
+        "bytes": size,
+        "first_byte_ms": round((first_byte or 0) * 1000, 1),
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(args.rows / elapsed),
+        "rss_growth_mb": round((rss_peak - rss_start) / 1024, 1),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"{report['rows']} rows ({report['format']}, {report['vendor']}): "
+            f"first byte {report['first_byte_ms']} ms, {report['seconds']} s total, "
+            f"{report['rows_per_sec']} rows/s, {report['bytes'] / 1e6:.1f} MB, "
+            f"RSS +{report['rss_growth_mb']} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Stress test for concurrent ``initialize_payment`` calls by one parent.
+
+Serves the app on a local threaded server with the stub Flutterwave API
+(``--latency-ms`` per call, so requests overlap) and checks two cases:
+
+* double submit: one confirmation page posted ``--submits`` times at once
+  must create exactly one payment and make exactly one gateway call; every
+  response is the checkout redirect or a "being set up" 409, never a 500;
+* siblings: ``--siblings`` confirmations for different children of the
+  same parent, initialized at once, must create that many payments with
+  distinct references, none overwriting another.
+
+Exits with status 1 if either check fails.
+
+    python -m benchmarks.idempotency_stress --submits 20 --siblings 6
+"""
+import argparse
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks._support import benchmark_database, setup_django
+from benchmarks.payment_flow import _QuietHandler, _ThreadingWSGIServer
+from benchmarks.stub_gateway import StubGateway
+
+PARENT_EMAIL = "busy.parent@example.com"
+
+
+def confirm(base, student):
+    """Go through the pay form as a fresh visitor; return the session and the confirmation form fields."""
+    session = requests.Session()
+    form = session.get(f"{base}/payments/pay/")
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', form.text)
+    page = session.post(f"{base}/payments/pay/", data={
+        "csrfmiddlewaretoken": token.group(1) if token else "",
+        "student_name": student,
+        "session": "2025/2026",
+        "student_class": "Primary 3",
+        "term": "First Term",
+        "parent_email": PARENT_EMAIL,
+        "amount": "45000",
+    })
+    key = re.search(r'name="idempotency_key" value="([^"]+)"', page.text)
+    return session, {"idempotency_key": key.group(1) if key else ""}
+
+
+def fire(count, func):
+    barrier = threading.Barrier(count)
+
+    def call():
+        barrier.wait()
+        try:
+            return func()
+        except requests.RequestException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: call(), range(count)))
+
+
+def outcome(response):
+    if isinstance(response, Exception):
+        return type(response).__name__
+    if response.status_code == 302:
+        return "302 checkout"
+    return str(response.status_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submits", type=int, default=20)
+    parser.add_argument("--siblings", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from wsgiref.simple_server import make_server
+
+    from payments.models import Payment
+
+    failures = []
+    with StubGateway(latency=args.latency_ms / 1000) as stub, benchmark_database(), \
+            tempfile.TemporaryDirectory() as receipts:
+        settings.FLW_BASE_URL = stub.base_url
+        settings.RECEIPT_CACHE_DIR = receipts
+        settings.ALLOWED_HOSTS = ["*"]
+        # The repeated submissions must reach the view, not stop at the limiter or the cap
+        settings.RATE_LIMIT_ENABLED = False
+        settings.FLW_MAX_IN_FLIGHT = 0
+
+        server = make_server("127.0.0.1", 0, get_wsgi_application(),
+                             server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        initialize = f"{base}/payments/initialize/"
+
+        # --- double submit -------------------------------------------------
+        session, fields = confirm(base, "Double Click")
+        calls_before = stub.requests
+        responses = fire(args.submits, lambda: session.post(initialize, data=fields, allow_redirects=False))
+        links = {r.headers["Location"] for r in responses if not isinstance(r, Exception) and r.status_code == 302}
+        rows = Payment.objects.filter(idempotency_key=fields["idempotency_key"]).count()
+        gateway_calls = stub.requests - calls_before
+        again = session.post(initialize, data=fields, allow_redirects=False)
+
+        print(f"Double submit x{args.submits}: {dict(Counter(map(outcome, responses)))}")
+        print(f"  payments created {rows}, gateway calls {gateway_calls}, distinct checkout links {len(links)}, "
+              f"resubmit afterwards -> {outcome(again)}")
+        if rows != 1 or gateway_calls != 1 or len(links) != 1:
+            failures.append("double submit created duplicates")
+        if any(outcome(r) not in ("302 checkout", "409") for r in responses):
+            failures.append("double submit returned errors")
+        if outcome(again) != "302 checkout" or again.headers.get("Location") not in links:
+            failures.append("resubmit did not return the existing checkout")
+
+        # --- siblings ------------------------------------------------------
+        tabs = iter([confirm(base, f"Sibling {i}") for i in range(args.siblings)])
+        lock = threading.Lock()
+
+        def initialize_sibling():
+            with lock:
+                session, fields = next(tabs)
+            return session.post(initialize, data=fields, allow_redirects=False)
+
+        responses = fire(args.siblings, initialize_sibling)
+        payments = list(Payment.objects.filter(student_name__startswith="Sibling ").values_list(
+            "student_name", "payment_reference"))
+        print(f"Siblings x{args.siblings}: {dict(Counter(map(outcome, responses)))}")
+        print(f"  payments {len(payments)}, distinct references {len({ref for _, ref in payments})}, "
+              f"students {len({name for name, _ in payments})}")
+        if len(payments) != args.siblings or len({ref for _, ref in payments}) != args.siblings:
+            failures.append("sibling payments collided")
+
+        server.shutdown()
+        server.server_close()
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Roster import speed: ``import_students`` on a generated CSV, then a
+re-import of the same file (every row an update), then
+``link_student_payments`` over seeded payments for those students.
+
+    python -m benchmarks.import_students --students 50000 --payments 100000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+
+from benchmarks._support import CLASSES, SESSIONS, benchmark_database, seed_payments, setup_django
+
+SURNAMES = ["Okafor", "Adeyemi", "Bello", "Eze", "Musa"]
+
+
+def write_roster(path, count, seed=1234):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["admission_number", "name", "class", "session", "parent_email"])
+        for i in range(count):
+            writer.writerow([
+                f"ADM/{i:06d}",
+                f"Student {i} {rng.choice(SURNAMES)}",
+                rng.choice(CLASSES),
+                rng.choice(SESSIONS),
+                f"parent{i}@example.com",
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    from payments.models import Payment
+    from students.models import Student
+
+    with tempfile.TemporaryDirectory() as tmp, benchmark_database() as connection:
+        path = os.path.join(tmp, "roster.csv")
+        write_roster(path, args.students)
+        print(f"{args.students} students ({os.path.getsize(path) / 1e6:.1f} MB CSV) on {connection.vendor}")
+
+        for label in ("fresh import", "re-import"):
+            started = time.perf_counter()
+            call_command("import_students", path, batch_size=args.batch_size, stdout=io.StringIO())
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<13} {elapsed:6.2f} s  {args.students / elapsed:9,.0f} rows/s  "
+                  f"({Student.objects.count()} students)")
+
+        # Payments reuse the roster's "Student <i> <surname>" names, so a share of them match.
+        seed_payments(args.payments)
+        started = time.perf_counter()
+        call_command("link_student_payments", stdout=io.StringIO())
+        elapsed = time.perf_counter() - started
+        linked = Payment.objects.filter(student__isnull=False).count()
+        print(f"  link payments {elapsed:6.2f} s  {args.payments / elapsed:9,.0f} payments/s  ({linked} linked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+End-to-end load benchmark for the parent payment flow.
+
+Serves the real WSGI application on a local threaded HTTP server, backed
+by a scratch database, the stub Flutterwave API and a dummy SMTP sink.
+``--concurrency`` virtual parents each run the full flow
+``--iterations`` times:
+
+    pay        GET  /payments/pay/            (empty form)
+    confirm    POST /payments/pay/            (confirmation page)
+    initialize POST /payments/initialize/     (pending row + gateway checkout)
+    webhook    POST /payments/webhook/flutterwave/  (gateway confirms; recorded only)
+    verify     GET  /payments/verify/         (redirect back from checkout)
+    receipt    GET  /payments/receipt/<ref>/  (PDF download)
+
+and the webhooks and outbox are then drained with ``process_webhooks``
+and ``send_outbox``. For every step it reports p50/p95/p99 latency and
+mean DB queries per request, plus overall throughput. Results can be saved as JSON and compared with an
+earlier run to catch regressions between commits:
+
+    python -m benchmarks.payment_flow --concurrency 8 --iterations 25 --save baseline.json
+    python -m benchmarks.payment_flow --concurrency 8 --iterations 25 --compare baseline.json
+"""
+import argparse
+import io
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+from benchmarks._support import ROOT, benchmark_database, setup_django, summarize
+from benchmarks.dummy_smtp import DummySMTPServer
+from benchmarks.stub_gateway import StubGateway
+
+STEPS = ["pay", "confirm", "initialize", "webhook", "verify", "receipt"]
+QUERY_HEADER = "X-Bench-Queries"
+WEBHOOK_SECRET = "bench-secret-hash"
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def counting_app(app):
+    """Wrap the WSGI app so every response carries its DB query count."""
+    from django.db import connection
+
+    def wrapped(environ, start_response):
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            return start_response(status, headers + [(QUERY_HEADER, str(count[0]))], exc_info)
+
+        with connection.execute_wrapper(counter):
+            return app(environ, counted_start_response)
+
+    return wrapped
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, step, func, expect):
+        started = time.perf_counter()
+        try:
+            response = func()
+            if hasattr(response, "content"):
+                response.content  # include the body transfer
+        except requests.RequestException:
+            with self._lock:
+                self.errors[step] += 1
+            return None
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if response.status_code not in expect:
+                self.errors[step] += 1
+            self.samples[step].append(elapsed)
+            if QUERY_HEADER in response.headers:
+                self.queries[step].append(int(response.headers[QUERY_HEADER]))
+        return response
+
+
+def run_flow(base, stub, recorder, user, iteration, headers=None):
+    session = requests.Session()
+    session.headers.update(headers or {})
+    email = f"parent{user}-{iteration}@example.com"
+
+    form = recorder.call("pay", lambda: session.get(f"{base}/payments/pay/"), {200})
+    if form is None:
+        return
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', form.text)
+    fields = {
+        "csrfmiddlewaretoken": token.group(1) if token else "",
+        "student_name": f"Bench Student {user}-{iteration}",
+        "session": "2025/2026",
+        "student_class": "Primary 3",
+        "term": "First Term",
+        "parent_email": email,
+        "amount": "45000",
+    }
+    if recorder.call("confirm", lambda: session.post(f"{base}/payments/pay/", data=fields,
+                                                     headers={"Referer": f"{base}/payments/pay/"}), {200}) is None:
+        return
+
+    init = recorder.call("initialize", lambda: session.post(f"{base}/payments/initialize/", allow_redirects=False),
+                         {302})
+    if init is None or "Location" not in init.headers:
+        return
+    transaction_id = int(urlparse(init.headers["Location"]).path.rstrip("/").split("/")[-1])
+    record = stub.transactions[transaction_id]
+    tx_ref = record["tx_ref"]
+
+    event = {"event": "charge.completed", "data": {
+        "id": transaction_id, "tx_ref": tx_ref, "status": "successful", "amount": record["amount"],
+        "currency": "NGN", "customer": {"email": email},
+    }}
+    recorder.call("webhook", lambda: requests.post(f"{base}/payments/webhook/flutterwave/", json=event,
+                                                   headers={"verif-hash": WEBHOOK_SECRET}), {200})
+    recorder.call("verify", lambda: session.get(
+        f"{base}/payments/verify/",
+        params={"status": "successful", "tx_ref": tx_ref, "transaction_id": transaction_id},
+    ), {200})
+    recorder.call("receipt", lambda: session.get(f"{base}/payments/receipt/{tx_ref}/"), {200})
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline_path, tolerance):
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+
+    regressions = []
+    print(f"\nCompared with {baseline_path} (commit {baseline['meta'].get('commit')}), p95 ms:")
+    for step in STEPS:
+        old, new = baseline["steps"].get(step), report["steps"].get(step)
+        if not old or not new or not old.get("p95_ms"):
+            continue
+        change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"  {step:<11} {old['p95_ms']:>9.1f} -> {new['p95_ms']:>9.1f}  ({change:+.1f}%){flag}")
+        if flag:
+            regressions.append(step)
+
+    old_tp, new_tp = baseline["throughput"]["flows_per_sec"], report["throughput"]["flows_per_sec"]
+    change = (new_tp - old_tp) / old_tp * 100 if old_tp else 0.0
+    print(f"  throughput  {old_tp:>9.2f} -> {new_tp:>9.2f} flows/s ({change:+.1f}%)")
+    if change < -tolerance:
+        regressions.append("throughput")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=10, help="Flows per virtual parent.")
+    parser.add_argument("--gateway-latency-ms", type=float, default=0.0)
+    parser.add_argument("--save", metavar="PATH", help="Write the results as JSON (e.g. a baseline).")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a saved baseline; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p95/throughput change in percent.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+
+    with StubGateway(latency=args.gateway_latency_ms / 1000) as stub, DummySMTPServer() as smtp, \
+            benchmark_database() as connection, tempfile.TemporaryDirectory() as receipts:
+        settings.FLW_BASE_URL = stub.base_url
+        settings.FLW_SECRET_HASH = WEBHOOK_SECRET
+        settings.EMAIL_HOST, settings.EMAIL_PORT = smtp.address
+        settings.EMAIL_USE_TLS = False
+        settings.EMAIL_HOST_USER = settings.DEFAULT_FROM_EMAIL = "accounts@example.com"
+        settings.EMAIL_HOST_PASSWORD = ""  # no AUTH against the sink
+        settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+        settings.RECEIPT_CACHE_DIR = receipts
+        settings.ALLOWED_HOSTS = ["*"]
+        settings.DEBUG = False
+        settings.RATE_LIMIT_ENABLED = False  # every virtual parent shares 127.0.0.1
+
+        server = make_server("127.0.0.1", 0, counting_app(get_wsgi_application()),
+                             server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [
+                pool.submit(run_flow, base, stub, recorder, user, iteration)
+                for user in range(args.concurrency)
+                for iteration in range(args.iterations)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+
+        call_command("process_webhooks", stdout=io.StringIO())
+        mail_started = time.perf_counter()
+        call_command("send_outbox", stdout=io.StringIO())
+        mail_elapsed = time.perf_counter() - mail_started
+        vendor = connection.vendor
+
+    flows = args.concurrency * args.iterations
+    steps = {}
+    for step in STEPS:
+        stats = summarize(recorder.samples[step])
+        queries = recorder.queries[step]
+        stats["queries_mean"] = round(sum(queries) / len(queries), 2) if queries else None
+        stats["errors"] = recorder.errors[step]
+        steps[step] = stats
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "vendor": vendor,
+            "python": sys.version.split()[0],
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "gateway_latency_ms": args.gateway_latency_ms,
+        },
+        "throughput": {
+            "flows": flows,
+            "seconds": round(elapsed, 2),
+            "flows_per_sec": round(flows / elapsed, 2),
+            "requests_per_sec": round(sum(len(s) for s in recorder.samples.values()) / elapsed, 2),
+        },
+        "steps": steps,
+        "email": {
+            "messages": smtp.messages,
+            "seconds": round(mail_elapsed, 2),
+            "per_sec": round(smtp.messages / mail_elapsed, 1) if mail_elapsed else None,
+        },
+    }
+
+    print(f"{flows} flows at concurrency {args.concurrency} on {vendor}: "
+          f"{report['throughput']['flows_per_sec']} flows/s, {report['throughput']['requests_per_sec']} req/s")
+    print(f"  {'step':<11} {'p50':>8} {'p95':>8} {'p99':>8}  {'queries':>7}  errors")
+    for step, stats in steps.items():
+        if not stats.get("n"):
+            print(f"  {step:<11} (no samples)  errors {stats['errors']}")
+            continue
+        print(f"  {step:<11} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}  "
+              f"{stats['queries_mean'] if stats['queries_mean'] is not None else '-':>7}  {stats['errors']}")
+    print(f"  outbox: {smtp.messages} emails in {report['email']['seconds']} s")
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.compare and compare(report, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of ``manage.py reconcile_payments`` against the stub gateway.
+
+Seeds ``--rows`` pending payments, starts a local stub Flutterwave API
+with ``--latency-ms`` per call, and runs the reconciliation with each of
+the requested worker counts on a fresh copy of the data.
+
+    python -m benchmarks.reconcile --rows 5000 --latency-ms 100 --workers 1 8 32
+"""
+import argparse
+import io
+import time
+
+from benchmarks._support import benchmark_database, seed_payments, setup_django
+from benchmarks.stub_gateway import StubGateway
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from payments.models import FeeCollectionRollup, OutboundEmail, Payment
+
+    with StubGateway(latency=args.latency_ms / 1000) as stub, benchmark_database():
+        settings.FLW_BASE_URL = stub.base_url
+        print(f"{args.rows} pending payments, stub latency {args.latency_ms:.0f} ms")
+
+        for workers in args.workers:
+            Payment.objects.all().delete()
+            OutboundEmail.objects.all().delete()
+            FeeCollectionRollup.objects.all().delete()
+            seed_payments(args.rows)
+            Payment.objects.update(status="pending")
+
+            started = time.perf_counter()
+            call_command("reconcile_payments", workers=workers, min_age=0, stdout=io.StringIO())
+            elapsed = time.perf_counter() - started
+            settled = Payment.objects.exclude(status="pending").count()
+            print(f"  {workers:>3} workers: {elapsed:7.2f} s, {args.rows / elapsed:8.1f} checks/s, {settled} settled")
+
+
+if __name__ == "__main__":
+    main()
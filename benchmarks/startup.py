@@ -0,0 +1,122 @@
+"""
+Worker startup cost: import time and time-to-first-response under gunicorn.
+
+1. In fresh interpreters, times building the WSGI application plus the URL
+   resolver (what a worker does before it can serve anything), and lists
+   which heavy optional libraries that already pulled in.
+2. Starts the real ``gunicorn -c gunicorn.conf.py`` (sync workers) with
+   ``PRELOAD_APP`` off and on, and measures the time from spawning the
+   process to the first successful response on ``--path``, plus the
+   latency of that first request against later ones.
+
+    python -m benchmarks.startup --repeat 5 --workers 2
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks._support import ROOT, summarize
+
+HEAVY = ("reportlab", "qrcode", "PIL", "requests", "httpx")
+
+IMPORT_PROBE = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "school_portal.settings")
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().reverse_dict
+print(time.perf_counter() - started)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def import_time(env, repeat):
+    samples, loaded = [], ""
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(heavy=HEAVY)], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout.split("\n")
+        samples.append(float(out[0]))
+        loaded = out[1]
+    return samples, loaded
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response(env, path, workers, preload, timeout=60):
+    """Spawn gunicorn; return (seconds to first 200, first request seconds, later request seconds)."""
+    port = free_port()
+    env = {**env, "PORT": str(port), "WEB_CONCURRENCY": str(workers), "PRELOAD_APP": str(preload),
+           "WORKER_CLASS": "sync"}
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                             "--log-level", "warning", "--access-logfile", "/dev/null"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("gunicorn did not answer in time")
+            request_started = time.perf_counter()
+            try:
+                response = requests.get(url, timeout=timeout)
+            except requests.ConnectionError:
+                time.sleep(0.005)
+                continue
+            if response.status_code == 200:
+                ttfr = time.perf_counter() - started
+                first = time.perf_counter() - request_started
+                break
+            raise RuntimeError(f"{url} answered HTTP {response.status_code}")
+
+        later = []
+        for _ in range(20):
+            request_started = time.perf_counter()
+            requests.get(url, timeout=timeout)
+            later.append(time.perf_counter() - request_started)
+        return ttfr, first, statistics.median(later)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--path", default="/payments/pay/")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # A scratch database and cache so the workers never touch the real ones
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(scratch, 'startup.sqlite3')}",
+               "CACHE_BACKEND": "file", "CACHE_DIR": os.path.join(scratch, "cache")}
+
+        samples, loaded = import_time(env, args.repeat)
+        stats = summarize(samples)
+        print(f"App import + URL resolver: p50 {stats['p50_ms']:.0f} ms, mean {stats['mean_ms']:.0f} ms "
+              f"over {args.repeat} interpreters")
+        print(f"  heavy libraries loaded at startup: {loaded or 'none'}")
+
+        for preload in (False, True):
+            results = [first_response(env, args.path, args.workers, preload) for _ in range(args.repeat)]
+            ttfr, first, later = (summarize([r[i] for r in results]) for i in range(3))
+            print(f"gunicorn, {args.workers} sync workers, PRELOAD_APP={preload}: "
+                  f"time to first response p50 {ttfr['p50_ms']:.0f} ms; "
+                  f"first request {first['p50_ms']:.1f} ms vs {later['p50_ms']:.1f} ms afterwards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Local stand-in for the Flutterwave v3 API.
+
+Implements just the endpoints the portal calls, with an optional fixed
+latency, so benchmarks and manual tests never touch the real gateway.
+Point the app at it with ``FLW_BASE_URL=http://127.0.0.1:<port>/v3``.
+
+    python -m benchmarks.stub_gateway --port 8765 --latency-ms 150
+
+Endpoints:
+
+* ``POST /v3/payments`` records the checkout and returns a hosted link.
+* ``GET /v3/transactions/<id>/verify`` reports a checkout created here.
+* ``GET /v3/transactions/verify_by_reference?tx_ref=...`` reports any
+  reference. Unknown references get a deterministic outcome (mostly
+  successful, some failed, some not found) so reconciliation runs have
+  something to do.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # the default backlog of 5 drops bursts from async clients
+
+
+class StubGateway:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.transactions = {}  # id -> {"tx_ref", "amount", "email"}
+        self.by_reference = {}  # tx_ref -> id
+        self.requests = 0
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self.server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- behaviour ---------------------------------------------------------
+    def create_checkout(self, payload):
+        with self._lock:
+            transaction_id = next(self._ids)
+            self.transactions[transaction_id] = {
+                "tx_ref": payload.get("tx_ref"),
+                "amount": payload.get("amount"),
+                "email": (payload.get("customer") or {}).get("email"),
+            }
+            self.by_reference[payload.get("tx_ref")] = transaction_id
+        host, port = self.server.server_address[:2]
+        link = f"http://{host}:{port}/checkout/{transaction_id}"
+        return 200, {"status": "success", "message": "Hosted Link", "data": {"link": link}}
+
+    def verify(self, transaction_id):
+        record = self.transactions.get(transaction_id)
+        if record is None:
+            return 400, {"status": "error", "message": "No transaction was found for this id", "data": None}
+        return 200, self._verified(transaction_id, record, "successful")
+
+    def verify_by_reference(self, tx_ref):
+        transaction_id = self.by_reference.get(tx_ref)
+        if transaction_id is not None:
+            return 200, self._verified(transaction_id, self.transactions[transaction_id], "successful")
+
+        bucket = int(hashlib.md5(tx_ref.encode()).hexdigest(), 16) % 10
+        if bucket == 9:
+            return 400, {"status": "error", "message": "No transaction was found for this id", "data": None}
+        status = "failed" if bucket == 8 else "successful"
+        return 200, self._verified(bucket, {"tx_ref": tx_ref, "amount": None, "email": None}, status)
+
+    @staticmethod
+    def _verified(transaction_id, record, status):
+        return {
+            "status": "success",
+            "message": "Transaction fetched successfully",
+            "data": {
+                "id": transaction_id,
+                "tx_ref": record["tx_ref"],
+                "amount": record["amount"],
+                "currency": "NGN",
+                "status": status,
+                "customer": {"email": record["email"]},
+            },
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _route(self, method):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                if method == "POST" and parts == ["v3", "payments"]:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    return stub.create_checkout(json.loads(self.rfile.read(length) or b"{}"))
+                if method == "GET" and parts[:2] == ["v3", "transactions"]:
+                    if parts[2:] == ["verify_by_reference"]:
+                        return stub.verify_by_reference(parse_qs(url.query).get("tx_ref", [""])[0])
+                    if len(parts) == 4 and parts[3] == "verify" and parts[2].isdigit():
+                        return stub.verify(int(parts[2]))
+                return 404, {"status": "error", "message": "Not found"}
+
+            def do_GET(self):
+                self._reply(*self._route("GET"))
+
+            def do_POST(self):
+                self._reply(*self._route("POST"))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubGateway(args.host, args.port, latency=args.latency_ms / 1000)
+    print(f"Stub Flutterwave API on {stub.base_url} (latency {args.latency_ms:.0f} ms). Ctrl+C to stop.")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
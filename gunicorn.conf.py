@@ -0,0 +1,66 @@
+"""
+Gunicorn deployment profiles: ``gunicorn -c gunicorn.conf.py``.
+
+WORKER_CLASS=sync (default) serves school_portal.wsgi with classic sync
+workers, one request per worker at a time. WORKER_CLASS=asgi serves
+school_portal.asgi on uvicorn workers, where each worker's event loop
+holds many in-flight gateway calls at once.
+
+With PRELOAD_APP (default on) the master imports the app once and warms
+the URL resolver and templates before forking, so workers start with them
+already in (copy-on-write shared) memory; each worker then opens its own
+database connection before taking traffic. See school_portal/warmup.py.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+if os.getenv("WORKER_CLASS", "sync") == "asgi":
+    wsgi_app = "school_portal.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+else:
+    wsgi_app = "school_portal.wsgi:application"
+    worker_class = "sync"
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+accesslog = "-"
+
+# ===========================
+# PRELOAD & WARM-UP
+# ===========================
+preload_app = os.getenv("PRELOAD_APP", "True").lower() == "true"
+
+
+def _warm_up(log, who, connect):
+    from school_portal.warmup import warm_up
+
+    timings = warm_up(connect=connect)
+    log.info("Warm-up (%s): %s", who, ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()))
+
+
+def when_ready(server):
+    if preload_app:
+        _warm_up(server.log, "master", connect=False)
+        # Keep the preloaded objects out of the workers' GC passes, which would
+        # otherwise touch (and un-share) every page the master filled
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from django.db import connections
+
+        # Never share a database socket inherited from the master
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # Runs in each worker once the app is loaded. Under ASGI the database is
+    # used from a separate sync thread, so only sync workers connect here.
+    _warm_up(worker.log, f"worker {worker.pid}", connect=worker_class == "sync")
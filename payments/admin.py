@@ -1,18 +1,109 @@
 from django.contrib import admin, messages
-from django.db.models import Sum
-from .models import Payment
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ERROR_FLAG, ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q, Sum
+from .models import OutboundEmail, Payment, WebhookEvent
+from .pagination import EstimatedCountPaginator
+from . import exports, rollup, search
 from django.contrib.admin.models import LogEntry
-from django.urls import path
+from django.urls import path, reverse
 from django.shortcuts import redirect
+from django.http import StreamingHttpResponse
 from django.utils.html import format_html
+from django.utils import timezone
+
+# ✅ Filter choices come from the (small) rollup table rather than a DISTINCT
+# scan over every payment on each changelist load
+class RollupValuesFilter(admin.AllValuesFieldListFilter):
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.lookup_choices = rollup.filter_values(field_path)
+
+
+# ✅ Exports only need the filtered, ordered queryset: skip the page query and counts
+class ExportChangeList(ChangeList):
+    def get_results(self, request):
+        pass
+
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ("student_name", "student_class", "session", "term", "parent_email", "amount", "status", "date")
-    list_filter = ("student_class", "term", "session", "status")  # ✅ added class & status
+    list_filter = (  # ✅ added class & status
+        ("student_class", RollupValuesFilter),
+        ("term", RollupValuesFilter),
+        ("session", RollupValuesFilter),
+        ("status", RollupValuesFilter),
+    )
     search_fields = ("student_name", "parent_email", "payment_reference")
     ordering = ("-date",)
     list_per_page = 25
+    raw_id_fields = ("student",)  # ✅ no <select> with the whole roster on the change form
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # ✅ skip the second, unfiltered COUNT(*) per page
+    actions = ["export_selected_csv", "download_receipts_zip"]
+
+    # ✅ Indexed search (see payments/search.py); the stock icontains scan is only a fallback
+    def get_search_results(self, request, queryset, search_term):
+        prefix = search.reference_prefix_filter(search_term)
+        if prefix is not None:
+            return queryset.filter(prefix), False
+        if search_term.strip() and search.is_available(queryset.db):
+            results = search.filter_queryset(queryset, search_term)
+            if results is not None:
+                return results, False
+        return super().get_search_results(request, queryset, search_term)
+
+    # ✅ Export the filtered changelist (admin/payments/payment/export/<fmt>/?<filters>)
+    def get_urls(self):
+        urls = [
+            path(
+                "export/<str:fmt>/",
+                self.admin_site.admin_view(self.export_view),
+                name="payments_payment_export",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def get_changelist(self, request, **kwargs):
+        match = request.resolver_match
+        if match is not None and match.url_name == "payments_payment_export":
+            return ExportChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def export_view(self, request, fmt):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            queryset = self.get_changelist_instance(request).queryset
+        except IncorrectLookupParameters:
+            # Same as the changelist: back to the unfiltered list instead of a 500
+            messages.error(request, "The export filters are not valid.")
+            return redirect(f"{reverse('admin:payments_payment_changelist')}?{ERROR_FLAG}=1")
+        filename = f"payments-{timezone.localdate():%Y%m%d}"
+
+        if fmt == "csv":
+            return exports.for_asgi(request, exports.csv_response(queryset, filename))
+        if fmt == "xlsx" and exports.xlsx_available():
+            return exports.for_asgi(request, exports.xlsx_response(queryset, filename))
+        messages.error(request, f"Export format '{fmt}' is not available.")
+        return redirect("admin:payments_payment_changelist")
+
+    @admin.action(description="Download receipts for selected payments (ZIP)")
+    def download_receipts_zip(self, request, queryset):
+        from . import receipt_batch  # ✅ ReportLab/qrcode/Pillow load on first use, not at worker start
+
+        fields = receipt_batch.iter_receipt_fields(queryset.order_by("student_class", "student_name", "pk"))
+        # ✅ Rendered in this thread; the process pool is only for `manage.py build_receipts`
+        response = StreamingHttpResponse(receipt_batch.iter_zip(fields, workers=1), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="receipts-{timezone.localdate():%Y%m%d}.zip"'
+        return exports.for_asgi(request, response)
+
+    @admin.action(description="Export selected payments to CSV")
+    def export_selected_csv(self, request, queryset):
+        response = exports.csv_response(queryset.order_by("-date"), f"payments-selected-{timezone.localdate():%Y%m%d}")
+        return exports.for_asgi(request, response)
 
     # ✅ Disable admin history logging of deletions (optional)
     def log_deletion(self, request, object, object_repr):
@@ -22,14 +113,70 @@ class PaymentAdmin(admin.ModelAdmin):
     def changelist_view(self, request, extra_context=None):
         response = super().changelist_view(request, extra_context=extra_context)
         try:
-            qs = response.context_data["cl"].queryset
-            # ✅ Filter only successful payments
-            total = qs.filter(status="successful").aggregate(total_amount=Sum("amount"))["total_amount"] or 0
+            cl = response.context_data["cl"]
+            total = self._total_from_rollup(request, cl)
+            if total is None:
+                # ✅ Filter only successful payments
+                total = self._total_from_queryset(cl)
             response.context_data["total_amount"] = total
         except (AttributeError, KeyError):
             pass
         return response
 
+    # ✅ Plain class/term/session/status filters can be answered from the rollup table
+    ROLLUP_FILTERS = {"student_class__exact", "term__exact", "session__exact", "status__exact"}
+
+    def _total_from_rollup(self, request, cl):
+        params = cl.get_filters_params()
+        if cl.query or not set(params) <= self.ROLLUP_FILTERS or any(len(v) != 1 for v in params.values()):
+            return None
+        params = {k: v[0] for k, v in params.items()}
+        if params.pop("status__exact", "successful") != "successful":
+            return 0
+        return rollup.successful_total(**{k.removesuffix("__exact"): v for k, v in params.items()})
+
+    @staticmethod
+    def _total_from_queryset(cl):
+        if cl.query:
+            # A search has already narrowed the rows; summing conditionally keeps the
+            # planner starting from the matches instead of walking the status index.
+            successful = Sum("amount", filter=Q(status="successful"))
+            return cl.queryset.order_by().aggregate(total_amount=successful)["total_amount"] or 0
+        return cl.queryset.filter(status="successful").aggregate(total_amount=Sum("amount"))["total_amount"] or 0
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "event_type", "tx_ref", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status",)
+    search_fields = ("event_id", "tx_ref")
+    readonly_fields = [f.name for f in WebhookEvent._meta.fields]
+    actions = ["requeue"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Requeue selected events for processing")
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status=WebhookEvent.STATUS_DEAD).update(
+            status=WebhookEvent.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        messages.success(request, f"✅ {updated} event(s) requeued.")
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("to_email", "subject")
+    readonly_fields = ("payment", "created_at", "sent_at", "last_error")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected emails for delivery")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+            status=OutboundEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        messages.success(request, f"✅ {updated} email(s) requeued.")
+
 # ✅ Custom admin view to clear recent actions
 @admin.register(LogEntry)
 class LogEntryAdmin(admin.ModelAdmin):
@@ -0,0 +1,414 @@
+"""
+Flutterwave API client shared by the payment views.
+
+A single ``FlutterwaveClient`` per process keeps a pooled keep-alive
+``requests.Session`` so payments do not pay for a fresh TCP+TLS handshake,
+uses separate connect/read timeouts, retries idempotent verify calls with
+jittered backoff, and trips a circuit breaker when the gateway keeps
+failing so views fail fast instead of tying up workers. An in-flight cap
+(``FLW_MAX_IN_FLIGHT``, counted across all workers in the shared cache)
+does the same when too many calls are already waiting on the gateway.
+
+``AsyncFlutterwaveClient`` is the same client on ``httpx.AsyncClient`` for
+the async views served under ASGI; it shares the process's breaker.
+
+``requests`` and ``httpx`` are imported when a client is first built, not
+when this module is, so workers do not pay for them at startup.
+"""
+import abc
+import asyncio
+import math
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+
+from school_portal import metrics
+
+
+class GatewayError(Exception):
+    """Flutterwave could not be reached or returned an unusable response."""
+
+
+class GatewayUnavailable(GatewayError):
+    """The circuit breaker is open; the gateway is not being called at all."""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GatewayBusy(GatewayUnavailable):
+    """Too many gateway calls are already in flight."""
+
+
+# ===========================================
+# CIRCUIT BREAKER
+# ===========================================
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures; probe again after ``reset_timeout`` seconds."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let exactly one request through to test the gateway.
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def abandon(self):
+        """A call ended without an outcome (cancelled, interrupted): free the half-open probe slot."""
+        with self._lock:
+            self._probing = False
+
+
+# ===========================================
+# IN-FLIGHT CAP
+# ===========================================
+def busy():
+    return GatewayBusy("The payment service is busy right now. Please try again in a few seconds.",
+                       retry_after=settings.FLW_BUSY_RETRY_AFTER)
+
+
+class InFlightLimit:
+    """
+    At most ``limit`` concurrent gateway calls per process (0 = unlimited).
+    A call over the cap is refused at once rather than queued, so a slow
+    gateway cannot pile up every worker thread or open connection.
+    """
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.current = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        return self.current
+
+    def check(self):
+        """Raise ``GatewayBusy`` if a call made now would be refused (a cheap early exit)."""
+        if self.limit and self.count() >= self.limit:
+            raise busy()
+
+    @contextmanager
+    def slot(self):
+        with self._lock:
+            self.check()
+            self.current += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+class SharedInFlightLimit(InFlightLimit):
+    """
+    ``InFlightLimit`` counted across every worker process in the default cache.
+
+    Sync workers serve one request at a time, so a per-process count never
+    reaches the cap; this one does. The counter needs an atomic ``incr``
+    (Redis in production). Every new call renews its ``ttl``, which is longer
+    than any single call can last, so the count left behind by a killed
+    worker expires once the gateway has been idle for ``ttl`` seconds.
+    """
+
+    KEY = "gateway-in-flight"
+
+    def __init__(self, limit=0, ttl=60):
+        super().__init__(limit)
+        self.ttl = ttl
+
+    def count(self):
+        return cache.get(self.KEY, 0)
+
+    @contextmanager
+    def slot(self):
+        if not self.limit:
+            yield
+            return
+
+        cache.add(self.KEY, 0, self.ttl)
+        try:
+            count = cache.incr(self.KEY)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.add(self.KEY, 0, self.ttl)
+            count = cache.incr(self.KEY)
+        cache.touch(self.KEY, self.ttl)
+        try:
+            if count > self.limit:
+                raise busy()
+            yield
+        finally:
+            try:
+                cache.decr(self.KEY)
+            except ValueError:
+                pass  # already expired
+
+
+# ===========================================
+# CLIENTS
+# ===========================================
+class BaseFlutterwaveClient(abc.ABC):
+    """API calls, retry policy and breaker bookkeeping; subclasses supply ``_request``."""
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url, secret_key, connect_timeout=3.05, read_timeout=6.0,
+                 pool_maxsize=10, verify_retries=2, backoff_base=0.25, backoff_max=2.0,
+                 breaker=None, in_flight=None):
+        self.base_url = base_url.rstrip("/")
+        self.secret_key = secret_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.verify_retries = verify_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = in_flight or InFlightLimit()
+        self.headers = {
+            "Authorization": f"Bearer {secret_key}",
+            "Content-Type": "application/json",
+        }
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        options = dict(
+            base_url=settings.FLW_BASE_URL,
+            secret_key=settings.FLW_SECRET_KEY,
+            connect_timeout=settings.FLW_CONNECT_TIMEOUT,
+            read_timeout=settings.FLW_READ_TIMEOUT,
+            pool_maxsize=settings.FLW_POOL_MAXSIZE,
+            verify_retries=settings.FLW_VERIFY_RETRIES,
+            backoff_base=settings.FLW_BACKOFF_BASE,
+            backoff_max=settings.FLW_BACKOFF_MAX,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.FLW_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.FLW_CIRCUIT_RESET_TIMEOUT,
+            ),
+            in_flight=SharedInFlightLimit(settings.FLW_MAX_IN_FLIGHT, ttl=cls.longest_call_seconds()),
+        )
+        options.update(overrides)
+        return cls(**options)
+
+    @staticmethod
+    def longest_call_seconds():
+        """Upper bound on one API call with every retry and backoff: the shared cap's counter TTL."""
+        attempts = settings.FLW_VERIFY_RETRIES + 1
+        return math.ceil(
+            attempts * (settings.FLW_CONNECT_TIMEOUT + settings.FLW_READ_TIMEOUT)
+            + settings.FLW_VERIFY_RETRIES * settings.FLW_BACKOFF_MAX
+        ) + 5
+
+    # --- API calls ---------------------------------------------------------
+    def initialize_payment(self, payload):
+        # Creating a checkout is not idempotent, so it is never retried.
+        return self._request("POST", "/payments", retries=0, operation="initialize", json=payload)
+
+    def verify_transaction(self, transaction_id):
+        return self._request(
+            "GET", f"/transactions/{quote(str(transaction_id), safe='')}/verify", retries=self.verify_retries,
+            operation="verify",
+        )
+
+    def verify_by_reference(self, tx_ref):
+        return self._request(
+            "GET", "/transactions/verify_by_reference", retries=self.verify_retries,
+            operation="verify_by_reference", params={"tx_ref": tx_ref},
+        )
+
+    # --- plumbing ----------------------------------------------------------
+    @abc.abstractmethod
+    def _request(self, method, path, retries=0, operation="other", **kwargs):
+        """Send one API call (retrying up to ``retries`` times) and return the decoded JSON body."""
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            raise GatewayUnavailable("Payment gateway is temporarily unavailable. Please try again shortly.",
+                                     retry_after=int(self.breaker.reset_timeout))
+
+    def _failed(self, exc):
+        self.breaker.record_failure()
+        return GatewayError(str(exc))
+
+    def _handle(self, res):
+        """Return ``(body, None)`` for a usable response or ``(None, retryable_error)``."""
+        if res.status_code in self.RETRYABLE_STATUS:
+            self.breaker.record_failure()
+            return None, GatewayError(f"Gateway returned HTTP {res.status_code}")
+        self.breaker.record_success()
+        try:
+            return res.json(), None
+        except ValueError:
+            raise GatewayError(f"Gateway returned a non-JSON response (HTTP {res.status_code})")
+
+    def _backoff(self, attempt):
+        # "Full jitter": a random delay up to the capped exponential step.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+class FlutterwaveClient(BaseFlutterwaveClient):
+    def __init__(self, *args, **kwargs):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        super().__init__(*args, **kwargs)
+        self.timeout = (self.connect_timeout, self.read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.headers)
+
+    def _request(self, method, path, retries=0, operation="other", **kwargs):
+        with self.in_flight.slot():
+            return self._attempts(method, f"{self.base_url}{path}", retries, operation, **kwargs)
+
+    def _attempts(self, method, url, retries, operation, **kwargs):
+        import requests
+
+        attempt = 0
+        while True:
+            self._check_breaker()
+            try:
+                with metrics.timer("gateway_request_duration_seconds", operation=operation):
+                    res = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                error = self._failed(e)
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            else:
+                body, error = self._handle(res)
+                if error is None:
+                    return body
+
+            if attempt >= retries:
+                raise error
+            attempt += 1
+            time.sleep(self._backoff(attempt))
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncFlutterwaveClient(BaseFlutterwaveClient):
+    """Same API as ``FlutterwaveClient``, but every call is awaited."""
+
+    def __init__(self, *args, **kwargs):
+        import httpx
+
+        super().__init__(*args, **kwargs)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize),
+        )
+
+    async def _request(self, method, path, retries=0, operation="other", **kwargs):
+        with self.in_flight.slot():
+            return await self._attempts(method, f"{self.base_url}{path}", retries, operation, **kwargs)
+
+    async def _attempts(self, method, url, retries, operation, **kwargs):
+        import httpx
+
+        attempt = 0
+        while True:
+            self._check_breaker()
+            try:
+                with metrics.timer("gateway_request_duration_seconds", operation=operation):
+                    res = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError as e:
+                error = self._failed(e)
+            except BaseException:
+                # e.g. CancelledError when the client disconnects: without this a
+                # cancelled half-open probe would keep the breaker shut for good
+                self.breaker.abandon()
+                raise
+            else:
+                body, error = self._handle(res)
+                if error is None:
+                    return body
+
+            if attempt >= retries:
+                raise error
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+# An httpx.AsyncClient is tied to the event loop that created it: one per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """Return the process-wide client, building it from settings on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FlutterwaveClient.from_settings()
+    return _client
+
+
+def get_async_client():
+    """Return the async client for the running event loop, sharing the sync client's breaker and cap."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        shared = get_client()
+        client = _async_clients[loop] = AsyncFlutterwaveClient.from_settings(
+            pool_maxsize=settings.FLW_ASYNC_MAX_CONNECTIONS,
+            breaker=shared.breaker,
+            in_flight=shared.in_flight,
+        )
+    return client
+
+
+def reset_client():
+    """Drop the shared clients (e.g. after changing ``FLW_*`` settings)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _async_clients.clear()
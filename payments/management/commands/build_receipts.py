@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments import receipt_batch
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = "Render receipts for many payments at once into a ZIP of PDFs or one merged PDF."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write (.zip or .pdf).")
+        parser.add_argument("--session", help="Only this academic session, e.g. 2025/2026.")
+        parser.add_argument("--term", help="Only this term, e.g. 'First Term'.")
+        parser.add_argument("--class", dest="student_class", help="Only this class, e.g. 'Primary 3'.")
+        parser.add_argument("--status", default="successful", help="Payment status to include (default: successful).")
+        parser.add_argument("--format", choices=["zip", "pdf"], help="Output format (default: from the file extension).")
+        parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count - 1).")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or ("pdf" if output.lower().endswith(".pdf") else "zip")
+
+        queryset = Payment.objects.filter(status=options["status"]).order_by("student_class", "student_name", "pk")
+        for field in ("session", "term", "student_class"):
+            if options[field]:
+                queryset = queryset.filter(**{field: options[field]})
+
+        total = queryset.count()
+        if not total:
+            raise CommandError("No payments match those filters.")
+
+        fields = receipt_batch.iter_receipt_fields(queryset)
+        started = time.perf_counter()
+        with open(output, "wb") as fh:
+            if fmt == "pdf":
+                pages = receipt_batch.write_merged_pdf(fields, fh, workers=options["workers"])
+            else:
+                for chunk in receipt_batch.iter_zip(fields, workers=options["workers"]):
+                    fh.write(chunk)
+                pages = total
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote {pages} receipt(s) to {output} in {elapsed:.1f}s ({pages / elapsed:.1f} pages/s)."
+        ))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments import services
+from payments.models import WebhookEvent
+
+
+class Command(BaseCommand):
+    help = "Apply recorded gateway webhooks to their payments, retrying failures and parking dead events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Events claimed per batch.")
+        parser.add_argument("--max-attempts", type=int, default=8, help="Attempts before an event is marked dead.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting once no event is due.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep between polls in --loop mode.")
+
+    def handle(self, *args, **options):
+        totals = services.WebhookBatch()
+        started = time.perf_counter()
+
+        try:
+            while True:
+                result = services.process_pending_webhooks(
+                    batch_size=options["batch_size"], max_attempts=options["max_attempts"]
+                )
+                for field in ("claimed", "processed", "retried", "dead"):
+                    setattr(totals, field, getattr(totals, field) + getattr(result, field))
+
+                if result.claimed:
+                    self.stdout.write(
+                        f"batch: claimed={result.claimed} processed={result.processed} "
+                        f"retried={result.retried} dead={result.dead}"
+                    )
+                    continue
+
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        pending = WebhookEvent.objects.filter(status=WebhookEvent.STATUS_PENDING).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals.processed}, retrying {totals.retried}, dead {totals.dead} in {elapsed:.1f}s."
+        ))
+        self.stdout.write(f"Pending events: {pending}")
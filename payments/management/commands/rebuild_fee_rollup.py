@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from payments import rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the fee-collection rollup from the payments table, or report drift with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report buckets that disagree; change nothing.")
+
+    def handle(self, *args, **options):
+        mismatches = rollup.drift()
+
+        for bucket, (stored, actual) in sorted(mismatches.items()):
+            label = " / ".join(bucket)
+            self.stdout.write(
+                f"{label}: rollup has {stored[0]} (₦{stored[1]:,.2f}), payments have {actual[0]} (₦{actual[1]:,.2f})"
+            )
+
+        if options["check"]:
+            if mismatches:
+                self.stdout.write(self.style.WARNING(f"{len(mismatches)} bucket(s) drifted."))
+            else:
+                self.stdout.write(self.style.SUCCESS("Rollup matches the payments table."))
+            return
+
+        buckets = rollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rollup rebuilt: {buckets} bucket(s)."))
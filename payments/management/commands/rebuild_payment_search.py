@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from payments import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the admin payment search index if missing and rebuild it from payments_payment "
+        "(SQLite FTS5 table or PostgreSQL pg_trgm index). It is normally kept up to date automatically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if not search.install(options["database"], rebuild=True):
+            raise CommandError("This database has no supported search index (needs SQLite FTS5 or PostgreSQL).")
+        self.stdout.write(self.style.SUCCESS("✅ Payment search index rebuilt."))
@@ -0,0 +1,155 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from payments import gateway, receipt_cache, rollup, services, verification
+from payments.models import OutboundEmail, Payment
+
+
+class Command(BaseCommand):
+    help = "Check pending payments against Flutterwave and record the ones that have settled."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only payments created on/after this date or ISO datetime.")
+        parser.add_argument("--limit", type=int, help="Check at most this many payments.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent gateway lookups (default: 16).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Payments loaded and written per batch.")
+        parser.add_argument(
+            "--min-age", type=int, default=15,
+            help="Skip payments younger than this many minutes; parents may still be at checkout (default: 15).",
+        )
+
+    def handle(self, *args, **options):
+        since = self._parse_since(options["since"])
+        pending = Payment.objects.filter(
+            status=services.PENDING, date__lt=timezone.now() - timedelta(minutes=options["min_age"])
+        )
+        if since:
+            pending = pending.filter(date__gte=since)
+
+        # --workers already bounds this process's concurrency; the web workers' cap does not apply
+        client = gateway.FlutterwaveClient.from_settings(pool_maxsize=options["workers"],
+                                                         in_flight=gateway.InFlightLimit())
+        totals = {"checked": 0, "successful": 0, "failed": 0, "unchanged": 0, "errors": 0}
+        started = time.perf_counter()
+        last_pk = 0
+        remaining = options["limit"]
+
+        try:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                while remaining is None or remaining > 0:
+                    size = options["batch_size"] if remaining is None else min(options["batch_size"], remaining)
+                    # Keyset pagination: rows settled by an earlier batch drop out without shifting offsets.
+                    batch = list(pending.filter(pk__gt=last_pk).order_by("pk")[:size])
+                    if not batch:
+                        break
+                    last_pk = batch[-1].pk
+                    if remaining is not None:
+                        remaining -= len(batch)
+
+                    verdicts = dict(zip(
+                        (p.pk for p in batch),
+                        pool.map(lambda p: self._lookup(client, p.payment_reference), batch),
+                    ))
+                    counts = self._apply(batch, verdicts, options["dry_run"])
+                    for key, value in counts.items():
+                        totals[key] += value
+
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"checked {totals['checked']} ({totals['checked'] / elapsed:.1f}/s): "
+                        f"{totals['successful']} successful, {totals['failed']} failed, "
+                        f"{totals['unchanged']} still pending, {totals['errors']} errors"
+                    )
+                    if client.breaker.is_open:
+                        raise CommandError("Gateway circuit breaker opened; stopping. Re-run once it recovers.")
+        finally:
+            client.close()
+
+        elapsed = time.perf_counter() - started
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} {totals['successful'] + totals['failed']} of {totals['checked']} pending payment(s) "
+            f"in {elapsed:.1f}s ({totals['checked'] / elapsed if elapsed else 0:.1f} checks/s)."
+        ))
+
+    # ------------------------------------------------------------------
+    def _parse_since(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError("--since must be a date (YYYY-MM-DD) or ISO datetime.")
+            parsed = datetime.combine(day, datetime.min.time())
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def _lookup(self, client, reference):
+        """Return ``(status, amount)`` from the gateway, ``None`` if unknown, or an exception."""
+        try:
+            result = client.verify_by_reference(reference)
+        except gateway.GatewayError as e:
+            return e
+        data = result.get("data") or {}
+        if result.get("status") != "success" or data.get("tx_ref") != reference:
+            return None
+        return data.get("status"), data.get("amount")
+
+    def _apply(self, batch, verdicts, dry_run):
+        counts = {"checked": len(batch), "successful": 0, "failed": 0, "unchanged": 0, "errors": 0}
+        settled = {}
+        for payment in batch:
+            verdict = verdicts[payment.pk]
+            if isinstance(verdict, Exception):
+                counts["errors"] += 1
+            elif verdict is None or verdict[0] not in services.SETTLED_STATUSES:
+                counts["unchanged"] += 1
+            else:
+                settled[payment.pk] = verdict
+
+        if not settled or dry_run:
+            for status, _ in settled.values():
+                counts["successful" if status == services.SUCCESSFUL else "failed"] += 1
+            return counts
+
+        with transaction.atomic():
+            # Re-read under lock: the webhook may have settled some of these meanwhile.
+            payments = list(
+                Payment.objects.select_for_update().filter(pk__in=settled, status=services.PENDING)
+            )
+            changes, emails = [], []
+            for payment in payments:
+                before = rollup.snapshot(payment)
+                status, amount = settled[payment.pk]
+                payment.status = status
+                if amount is not None:
+                    payment.amount = amount
+                changes.append((before, rollup.snapshot(payment)))
+                if status == services.SUCCESSFUL:
+                    emails.append(services.confirmation_email(payment))
+                    counts["successful"] += 1
+                else:
+                    counts["failed"] += 1
+
+            # bulk_update skips model signals, so do their work here.
+            Payment.objects.bulk_update(payments, ["status", "amount"])
+            rollup.apply_changes(changes)
+            OutboundEmail.objects.bulk_create(emails)
+            transaction.on_commit(lambda: self._invalidate(payments))
+
+        counts["unchanged"] += len(settled) - len(payments)
+        return counts
+
+    @staticmethod
+    def _invalidate(payments):
+        # The cached receipt PDFs and QR verification pages still show "pending"
+        for payment in payments:
+            receipt_cache.invalidate(payment.payment_reference)
+            verification.invalidate(payment.pk)
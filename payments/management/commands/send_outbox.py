@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payments import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox over a single reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages claimed per batch.")
+        parser.add_argument("--max-attempts", type=int, default=8, help="Attempts before a message is marked dead.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting once the queue is empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between polls in --loop mode.")
+
+    def handle(self, *args, **options):
+        totals = outbox.BatchResult()
+        connection = None
+        started = time.perf_counter()
+
+        try:
+            while True:
+                if connection is None:
+                    try:
+                        connection = outbox.open_connection()
+                    except Exception as e:
+                        if not options["loop"]:
+                            raise
+                        self.stderr.write(f"SMTP connection failed ({e}); retrying in {options['interval']}s")
+                        time.sleep(options["interval"])
+                        continue
+
+                result = outbox.deliver_batch(
+                    connection, batch_size=options["batch_size"], max_attempts=options["max_attempts"]
+                )
+                for field in ("claimed", "sent", "retried", "dead"):
+                    setattr(totals, field, getattr(totals, field) + getattr(result, field))
+
+                if result.claimed:
+                    self._report_batch(result)
+                    continue
+
+                if not options["loop"]:
+                    break
+                # Idle: don't hold the SMTP session open while waiting for work.
+                connection.close()
+                connection = None
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if connection is not None:
+                connection.close()
+
+        elapsed = time.perf_counter() - started
+        due, oldest = outbox.queue_depth()
+        rate = totals.sent / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals.sent}, retrying {totals.retried}, dead {totals.dead} "
+            f"in {elapsed:.1f}s ({rate:.1f} msg/s)."
+        ))
+        self.stdout.write(f"Queue depth: {due} due" + (
+            f", oldest pending since {timezone.localtime(oldest):%Y-%m-%d %H:%M:%S}" if oldest else ""
+        ))
+
+    def _report_batch(self, result):
+        due, _ = outbox.queue_depth()
+        rate = result.sent / result.elapsed if result.elapsed else 0.0
+        self.stdout.write(
+            f"batch: claimed={result.claimed} sent={result.sent} retried={result.retried} "
+            f"dead={result.dead} {rate:.1f} msg/s queue_depth={due}"
+        )
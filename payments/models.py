@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Payment(models.Model):
     student_name = models.CharField(max_length=255)
@@ -10,6 +11,107 @@ class Payment(models.Model):
     payment_reference = models.CharField(max_length=100, unique=True)
     status = models.CharField(max_length=50, default='successful')  # ✅ Payment status
     date = models.DateTimeField(auto_now_add=True)
+    # ✅ One per confirmation form: a double submit finds this row instead of creating another
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    checkout_link = models.URLField(max_length=500, blank=True)
+    # ✅ Set by `manage.py link_student_payments`; the name/class fields stay as entered
+    student = models.ForeignKey(
+        "students.Student", null=True, blank=True, on_delete=models.SET_NULL, related_name="payments"
+    )
+
+    class Meta:
+        # ✅ Match the admin changelist: filters on class/term/session/status, newest first
+        indexes = [
+            models.Index(fields=["-date"], name="payment_date_idx"),
+            models.Index(fields=["status", "-date"], name="payment_status_date_idx"),
+            models.Index(fields=["session", "term", "student_class", "-date"], name="payment_sess_term_cls_idx"),
+            models.Index(fields=["student_class", "-date"], name="payment_class_date_idx"),
+            models.Index(fields=["term", "-date"], name="payment_term_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student_name} - {self.payment_reference}"
+
+
+class FeeCollectionRollup(models.Model):
+    # ✅ Pre-aggregated totals per (session, term, class, status); kept in step
+    # with Payment by payments.rollup and rebuilt by `manage.py rebuild_fee_rollup`
+    session = models.CharField(max_length=20)
+    term = models.CharField(max_length=20)
+    student_class = models.CharField(max_length=100)
+    status = models.CharField(max_length=50)
+    payment_count = models.BigIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "term", "student_class", "status"], name="fee_rollup_unique_bucket"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.session} {self.term} {self.student_class} [{self.status}]: {self.payment_count}"
+
+
+class WebhookEvent(models.Model):
+    # ✅ One row per gateway event; the unique id makes redelivery a no-op.
+    # Applied later by `manage.py process_webhooks`, which retries failures
+    # with backoff and parks events that keep failing as dead
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSED = "processed"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50, blank=True)
+    tx_ref = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.event_type} - {self.event_id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    # ✅ Transactional outbox: rows are written alongside the payment change
+    # and delivered later by `manage.py send_outbox`
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    payment = models.ForeignKey(Payment, null=True, blank=True, on_delete=models.SET_NULL, related_name="emails")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to_email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
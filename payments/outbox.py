@@ -0,0 +1,118 @@
+"""
+Delivery side of the email outbox (see ``OutboundEmail``).
+
+Rows are claimed in batches with a short lease so several workers can
+drain the queue without sending the same message twice, then sent over a
+single reused SMTP connection. Failures are retried with exponential
+backoff until ``max_attempts``, after which the row is parked as dead.
+"""
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from school_portal import metrics
+
+from .models import OutboundEmail
+
+# How long a claimed batch is hidden from other workers while it is sent.
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+@dataclass
+class BatchResult:
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead: int = 0
+    elapsed: float = 0.0
+
+
+def claim_batch(batch_size):
+    """Lock and lease up to ``batch_size`` due messages; returns them as a list."""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        if messages:
+            OutboundEmail.objects.filter(pk__in=[m.pk for m in messages]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return messages
+
+
+def retry_delay(attempts, base=30, cap=3600):
+    return timedelta(seconds=min(cap, base * 2 ** (attempts - 1)))
+
+
+def deliver_batch(connection, batch_size=100, max_attempts=8):
+    """Send one batch over ``connection`` (an open mail backend) and record the outcome."""
+    started = time.perf_counter()
+    messages = claim_batch(batch_size)
+    result = BatchResult(claimed=len(messages))
+
+    for message in messages:
+        email = EmailMessage(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email,
+            to=[message.to_email],
+            connection=connection,
+        )
+        message.attempts += 1
+        try:
+            _send(connection, email)
+        except Exception as e:
+            message.last_error = f"{type(e).__name__}: {e}"[:2000]
+            if message.attempts >= max_attempts:
+                message.status = OutboundEmail.STATUS_DEAD
+                result.dead += 1
+            else:
+                message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+                result.retried += 1
+        else:
+            message.status = OutboundEmail.STATUS_SENT
+            message.sent_at = timezone.now()
+            message.last_error = ""
+            result.sent += 1
+
+    if messages:
+        OutboundEmail.objects.bulk_update(
+            messages, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _send(connection, email):
+    try:
+        with metrics.timer("smtp_send_duration_seconds"):
+            sent = email.send()
+    except Exception:
+        # A server that dropped an idle connection is worth one reconnect.
+        connection.close()
+        connection.open()
+        with metrics.timer("smtp_send_duration_seconds"):
+            sent = email.send()
+    if not sent:
+        raise RuntimeError("Mail backend accepted no recipients")
+
+
+def queue_depth():
+    """Return ``(due_now, oldest_pending_created_at)`` for the pending queue."""
+    pending = OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING)
+    due = pending.filter(next_attempt_at__lte=timezone.now()).count()
+    oldest = pending.order_by("created_at").values_list("created_at", flat=True).first()
+    return due, oldest
+
+
+def open_connection():
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    return connection
@@ -0,0 +1,162 @@
+"""
+Bulk receipt rendering for whole classes or sessions.
+
+Encoding the QR code and compressing each PDF dominate the cost of a
+receipt, so offline callers (``manage.py build_receipts``) spread that work
+over a ``ProcessPoolExecutor``. Web requests pass ``workers=1`` and render
+in the request thread: a pool there would start a process per call from
+inside a web worker. The pool uses the ``spawn`` start method, so its
+processes begin clean rather than as forks holding the parent's database
+connections. The static part of the page (header, labels, footer) is drawn
+once per document as a ReportLab form XObject and stamped onto each page
+with ``doForm``; only the per-payment values and QR image are drawn fresh.
+
+Two outputs are supported:
+
+* ``iter_zip`` yields a ZIP (one ``Receipt_<ref>.pdf`` per payment) in
+  pieces as receipts complete, so it can be written to disk or streamed in
+  an HTTP response without holding the archive in memory.
+* ``write_merged_pdf`` writes a single multi-page PDF. ReportLab keeps the
+  page streams of one document until ``save()``, so this mode grows with
+  the number of pages; prefer ZIP for very large batches.
+
+Workers only ever see plain dicts of strings: all database access happens
+in the calling process.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .utils import draw_receipt_fields, draw_receipt_layout, qr_png
+from .verification import verification_url
+
+LAYOUT_FORM = "receipt_layout"
+FIELDS = ("student_name", "session", "student_class", "term", "parent_email",
+          "amount", "payment_reference", "status", "date")
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def iter_receipt_fields(queryset, chunk_size=2000):
+    """Read payments as the plain dicts the workers draw from."""
+    rows = queryset.values_list("pk", *FIELDS).iterator(chunk_size=chunk_size)
+    for pk, *row in rows:
+        fields = dict(zip(FIELDS, row))
+        fields["amount"] = f"₦{fields['amount']:,.2f}"
+        fields["date"] = fields["date"].strftime("%Y-%m-%d %H:%M")
+        fields["verification_url"] = verification_url(pk)
+        yield fields
+
+
+def _new_canvas(buffer):
+    p = canvas.Canvas(buffer, pagesize=A4)
+    p.beginForm(LAYOUT_FORM)
+    draw_receipt_layout(p)
+    p.endForm()
+    return p
+
+
+# --- worker functions (run in child processes) ----------------------------
+def _render_pdfs(batch):
+    rendered = []
+    for fields in batch:
+        buffer = io.BytesIO()
+        p = _new_canvas(buffer)
+        p.doForm(LAYOUT_FORM)
+        draw_receipt_fields(p, fields, ImageReader(io.BytesIO(qr_png(fields))))
+        p.showPage()
+        p.save()
+        rendered.append((fields["payment_reference"], buffer.getvalue()))
+    return rendered
+
+
+def _render_qr_codes(batch):
+    return [(fields, qr_png(fields)) for fields in batch]
+
+
+# --- scheduling -----------------------------------------------------------
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run(func, items, workers, batch_size):
+    """Yield ``func`` results in input order, keeping a bounded number of batches in flight."""
+    batches = _batched(items, batch_size)
+    if workers <= 1:
+        for batch in batches:
+            yield from func(batch)
+        return
+
+    # Spawned processes import this module to run ``func``, which needs the app registry
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=django.setup) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(pool.submit(func, batch))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+# --- outputs --------------------------------------------------------------
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that collects bytes until the caller drains them."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(fields_iter, workers=None, batch_size=16):
+    """Yield the bytes of a ZIP archive of receipts as they are rendered."""
+    workers = default_workers() if workers is None else workers
+    sink = _ChunkSink()
+    # PDFs are already compressed; storing avoids deflating them a second time.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for reference, pdf in _run(_render_pdfs, fields_iter, workers, batch_size):
+            archive.writestr(f"Receipt_{reference}.pdf", pdf)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def write_merged_pdf(fields_iter, output, workers=None, batch_size=32):
+    """Render every receipt as one page of a single PDF written to ``output``; returns the page count."""
+    workers = default_workers() if workers is None else workers
+    p = _new_canvas(output)
+    pages = 0
+    for fields, png in _run(_render_qr_codes, fields_iter, workers, batch_size):
+        p.doForm(LAYOUT_FORM)
+        draw_receipt_fields(p, fields, ImageReader(io.BytesIO(png)))
+        p.showPage()
+        pages += 1
+    p.save()
+    return pages
@@ -0,0 +1,183 @@
+"""
+On-disk store for rendered receipt PDFs.
+
+Receipts are content-addressed: the file name is a fingerprint of every
+value printed on the receipt, so a changed payment never serves a stale
+PDF (or a stale ETag). Entries for a reference are dropped whenever its
+``Payment`` is saved or deleted (see ``payments.signals``), and the store
+is kept under ``RECEIPT_CACHE_MAX_BYTES`` by evicting the least recently
+served files.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+
+from school_portal import metrics
+
+from .verification import verification_url
+
+# Bump whenever the drawing code in utils.py changes so old PDFs are not served.
+RECEIPT_LAYOUT_VERSION = 3
+
+# Payment fields printed on a receipt (see utils.receipt_fields); all go into the fingerprint.
+PRINTED_FIELDS = ("student_name", "session", "student_class", "term", "parent_email",
+                  "amount", "payment_reference", "status", "date")
+
+# After an eviction pass the store is trimmed to this fraction of the limit,
+# so that a full cache does not evict on every single render.
+EVICTION_LOW_WATER = 0.9
+
+# Measuring the store walks every file, so a process only does it when the bytes
+# it has written since the last walk take the total over the limit, or when that
+# walk is older than this many seconds (the other workers write to the store too).
+EVICTION_SCAN_INTERVAL = 300
+
+_usage = {"bytes": 0, "scanned_at": None}
+_usage_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CachedReceipt:
+    path: Path
+    etag: str
+    last_modified: float
+    size: int
+    file: io.IOBase  # already open: an eviction after the lookup cannot take it away
+
+
+def _cache_dir():
+    return Path(settings.RECEIPT_CACHE_DIR)
+
+
+def _reference_dir(reference):
+    digest = hashlib.sha256(reference.encode()).hexdigest()[:32]
+    return _cache_dir() / digest[:2] / digest
+
+
+def receipt_fingerprint(payment):
+    values = [RECEIPT_LAYOUT_VERSION, verification_url(payment.pk)]
+    for field in PRINTED_FIELDS:
+        value = getattr(payment, field)
+        values.append(f"{Decimal(str(value)):.2f}" if field == "amount" else value)
+    raw = "\x1f".join(str(value) for value in values)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_or_render(payment):
+    """
+    Return the cached receipt for ``payment``, rendering it on a miss. The
+    receipt's ``file`` is open; whoever serves it closes it (``FileResponse``
+    does).
+    """
+    fingerprint = receipt_fingerprint(payment)
+    path = _reference_dir(payment.payment_reference) / f"{fingerprint}.pdf"
+
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        # Imported here so ReportLab, qrcode and Pillow load on the first render,
+        # not in every worker at startup
+        from .utils import render_receipt_pdf
+
+        with metrics.timer("receipt_render_duration_seconds", kind="single"):
+            pdf = render_receipt_pdf(payment).getvalue()
+        stat = _write_atomic(path, pdf)
+        _note_write(stat.st_size)
+        # Serve what was just rendered; the stored copy may already be evicted
+        file = io.BytesIO(pdf)
+    else:
+        stat = os.fstat(file.fileno())
+        # Bump atime only; mtime stays the Last-Modified of the rendered file.
+        try:
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
+    return CachedReceipt(path=path, etag=f'"{fingerprint}"', last_modified=stat.st_mtime,
+                         size=stat.st_size, file=file)
+
+
+def invalidate(reference):
+    """Remove every cached receipt for ``reference``."""
+    directory = _reference_dir(reference)
+    if not directory.is_dir():
+        return
+    for entry in directory.iterdir():
+        try:
+            entry.unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        directory.rmdir()
+    except OSError:
+        pass
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            stat = os.fstat(tmp.fileno())
+        os.replace(tmp_name, path)
+        return stat
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _note_write(size):
+    """Count a newly stored file and evict if the store may now be over the limit."""
+    limit = settings.RECEIPT_CACHE_MAX_BYTES
+    if not limit:
+        return
+    with _usage_lock:
+        _usage["bytes"] += size
+        scanned_at = _usage["scanned_at"]
+        if (scanned_at is not None and _usage["bytes"] <= limit
+                and time.monotonic() - scanned_at < EVICTION_SCAN_INTERVAL):
+            return
+        _usage["scanned_at"] = time.monotonic()  # this thread does the walk
+    total = _enforce_size_limit(limit)
+    with _usage_lock:
+        _usage["bytes"] = total
+
+
+def _enforce_size_limit(limit):
+    """Evict the least recently served files if the store is over ``limit``; return its size."""
+    entries = []
+    total = 0
+    for path in _cache_dir().glob("*/*/*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+        total += stat.st_size
+
+    if total <= limit:
+        return total
+
+    target = limit * EVICTION_LOW_WATER
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= target:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        total -= size
+    return total
@@ -0,0 +1,45 @@
+"""
+Payment references: ``TX-`` followed by a ULID-style id.
+
+The id is a 48-bit millisecond timestamp followed by 80 random bits,
+written as 26 Crockford base32 characters. References therefore sort by
+creation time (to the millisecond), need no database round-trip or
+shared counter to allocate, and are not guessable from one another.
+"""
+import secrets
+import time
+from datetime import datetime, timezone
+
+PREFIX = "TX-"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford: no I, L, O, U
+LENGTH = 26
+
+
+def new_reference(now=None):
+    """Allocate a fresh payment reference (``now`` is a Unix time, for tests/backfills)."""
+    millis = int((time.time() if now is None else now) * 1000)
+    return PREFIX + _encode((millis << 80) | secrets.randbits(80))
+
+
+def reference_time(reference):
+    """Creation time encoded in a reference from ``new_reference``, or None for legacy references."""
+    body = reference[len(PREFIX):] if reference.startswith(PREFIX) else ""
+    if len(body) != LENGTH or any(c not in ALPHABET for c in body):
+        return None
+    millis = _decode(body) >> 80
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+
+
+def _encode(value):
+    chars = []
+    for _ in range(LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
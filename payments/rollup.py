@@ -0,0 +1,116 @@
+"""
+Incremental maintenance of ``FeeCollectionRollup``.
+
+Every saved or deleted ``Payment`` moves its amount between rollup buckets
+(see ``payments.signals``). Code that changes payments in bulk, bypassing
+signals, should collect ``(before, after)`` snapshots and pass them to
+``apply_changes``. ``rebuild`` recomputes everything from the payments
+table for backfills and drift checks.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import FeeCollectionRollup, Payment
+
+DIMENSIONS = ("session", "term", "student_class", "status")
+
+
+def snapshot(payment):
+    """Return ``(bucket, amount)`` for a payment instance."""
+    bucket = tuple(getattr(payment, field) for field in DIMENSIONS)
+    return bucket, Decimal(str(payment.amount or 0))
+
+
+def stored_snapshot(pk):
+    """Read the current database state of a payment, or ``None``."""
+    row = Payment.objects.filter(pk=pk).values_list(*DIMENSIONS, "amount").first()
+    if row is None:
+        return None
+    return tuple(row[:-1]), Decimal(str(row[-1] or 0))
+
+
+def apply_changes(changes):
+    """Apply an iterable of ``(before, after)`` snapshots (either may be ``None``)."""
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before[0]][0] -= 1
+            deltas[before[0]][1] -= before[1]
+        if after is not None:
+            deltas[after[0]][0] += 1
+            deltas[after[0]][1] += after[1]
+
+    with transaction.atomic():
+        for bucket, (count, amount) in deltas.items():
+            if count or amount:
+                _bump(bucket, count, amount)
+
+
+def _bump(bucket, count, amount):
+    dims = dict(zip(DIMENSIONS, bucket))
+    rollup = FeeCollectionRollup.objects.filter(**dims)
+    if rollup.update(payment_count=F("payment_count") + count, total_amount=F("total_amount") + amount):
+        return
+    try:
+        with transaction.atomic():
+            FeeCollectionRollup.objects.create(payment_count=count, total_amount=amount, **dims)
+    except IntegrityError:
+        # Another writer created the bucket first.
+        rollup.update(payment_count=F("payment_count") + count, total_amount=F("total_amount") + amount)
+
+
+def compute_from_payments():
+    """Aggregate the payments table into ``{bucket: (count, total)}``."""
+    rows = Payment.objects.order_by().values(*DIMENSIONS).annotate(n=Count("pk"), total=Sum("amount"))
+    return {
+        tuple(row[field] for field in DIMENSIONS): (row["n"], row["total"] or Decimal("0"))
+        for row in rows
+    }
+
+
+def drift():
+    """Return ``{bucket: ((stored count, total), (actual count, total))}`` for mismatched buckets."""
+    actual = compute_from_payments()
+    stored = {
+        tuple(row[field] for field in DIMENSIONS): (row["payment_count"], row["total_amount"])
+        for row in FeeCollectionRollup.objects.values(*DIMENSIONS, "payment_count", "total_amount")
+    }
+    empty = (0, Decimal("0"))
+    return {
+        bucket: (stored.get(bucket, empty), actual.get(bucket, empty))
+        for bucket in stored.keys() | actual.keys()
+        if stored.get(bucket, empty) != actual.get(bucket, empty)
+    }
+
+
+def rebuild():
+    """Replace the rollup with a fresh aggregate; returns the number of buckets."""
+    actual = compute_from_payments()
+    with transaction.atomic():
+        FeeCollectionRollup.objects.all().delete()
+        FeeCollectionRollup.objects.bulk_create([
+            FeeCollectionRollup(payment_count=count, total_amount=total, **dict(zip(DIMENSIONS, bucket)))
+            for bucket, (count, total) in actual.items()
+        ], batch_size=1000)
+    return len(actual)
+
+
+def successful_total(**filters):
+    """Sum of successful payments for the given session/term/student_class filters."""
+    return (
+        FeeCollectionRollup.objects.filter(status="successful", **filters)
+        .aggregate(total=Sum("total_amount"))["total"] or Decimal("0")
+    )
+
+
+def filter_values(field):
+    """Distinct values of one dimension that currently have payments, in order."""
+    return (
+        FeeCollectionRollup.objects.filter(payment_count__gt=0)
+        .order_by(field).values_list(field, flat=True).distinct()
+    )
@@ -0,0 +1,178 @@
+"""
+Indexed search over payments for the admin.
+
+The admin's default search is an ``icontains`` OR across three columns,
+i.e. leading-wildcard ``LIKE`` scans of the whole table. Instead:
+
+* SQLite: an external-content FTS5 table with the ``trigram`` tokenizer
+  (substring matches of 3+ characters, case-insensitive), kept in sync
+  by triggers on ``payments_payment``, so bulk writes are covered too.
+* PostgreSQL: a ``pg_trgm`` GIN index over the concatenated columns,
+  which serves ``ILIKE '%term%'`` directly.
+
+Both are created (idempotently) after ``migrate``; see ``install``.
+Searches shaped like a payment reference skip the index and use the
+unique reference index as a prefix range.
+"""
+import logging
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.text import smart_split, unescape_string_literal
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ("student_name", "parent_email", "payment_reference")
+FTS_TABLE = "payments_payment_fts"
+PG_INDEX = "payment_search_trgm_idx"
+PG_DOCUMENT = "(student_name || ' ' || parent_email || ' ' || payment_reference)"
+MIN_TRIGRAM = 3  # shorter terms cannot use a trigram index
+ID_LIST_LIMIT = 900  # stays under SQLite's default 999 bound parameters
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        student_name, parent_email, payment_reference,
+        content='payments_payment', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON payments_payment BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, student_name, parent_email, payment_reference)
+        VALUES (new.id, new.student_name, new.parent_email, new.payment_reference);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON payments_payment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, student_name, parent_email, payment_reference)
+        VALUES ('delete', old.id, old.student_name, old.parent_email, old.payment_reference);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF student_name, parent_email, payment_reference ON payments_payment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, student_name, parent_email, payment_reference)
+        VALUES ('delete', old.id, old.student_name, old.parent_email, old.payment_reference);
+        INSERT INTO {FTS_TABLE}(rowid, student_name, parent_email, payment_reference)
+        VALUES (new.id, new.student_name, new.parent_email, new.payment_reference);
+    END""",
+]
+
+
+# ===========================================
+# INDEX MAINTENANCE
+# ===========================================
+def install(using="default", rebuild=False):
+    """Create the search index for ``using`` if it is missing; returns True when it is available."""
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            exists = cursor.fetchone() is not None
+            try:
+                for statement in _SQLITE_DDL:
+                    cursor.execute(statement)
+            except Exception as e:  # e.g. an SQLite build without FTS5/trigram
+                logger.warning("Payment search index unavailable: %s", e)
+                return False
+            if rebuild or not exists:
+                # Index rows that were written before the table existed.
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        return True
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON payments_payment "
+                    f"USING gin ({PG_DOCUMENT} gin_trgm_ops)"
+                )
+                if rebuild:
+                    cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+            except Exception as e:  # no permission to create the extension
+                logger.warning("Payment search index unavailable: %s", e)
+                return False
+        return True
+
+    return False
+
+
+_available = set()
+
+
+def is_available(using="default"):
+    if using in _available:
+        return True
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        sql, params = "SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE]
+    elif connection.vendor == "postgresql":
+        sql, params = "SELECT 1 FROM pg_indexes WHERE indexname = %s", [PG_INDEX]
+    else:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if cursor.fetchone() is None:
+            return False
+    _available.add(using)
+    return True
+
+
+# ===========================================
+# QUERYING
+# ===========================================
+def search_terms(search_term):
+    """Split like the admin does: whitespace-separated, with "quoted phrases" kept whole."""
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            terms.append(bit)
+    return terms
+
+
+def reference_prefix_filter(search_term):
+    """A Q matching references that start with ``search_term``, or None if it does not look like one."""
+    term = search_term.strip()
+    if " " in term or not term.upper().startswith("TX-") or len(term) < 4:
+        return None
+    rest = term[3:]
+    q = Q()
+    for prefix in {f"TX-{rest}", f"TX-{rest.upper()}"}:
+        # A range instead of LIKE so the unique index serves it on every backend.
+        q |= Q(payment_reference__gte=prefix, payment_reference__lt=prefix + "\U0010ffff")
+    return q
+
+
+def filter_queryset(queryset, search_term):
+    """Apply ``search_term`` to a Payment queryset using the search index; None if no index applies."""
+    terms = search_terms(search_term)
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    indexed = [t for t in terms if len(t) >= MIN_TRIGRAM]
+    if not indexed or vendor not in ("sqlite", "postgresql"):
+        return None
+
+    if vendor == "sqlite":
+        match = " AND ".join('"' + t.replace('"', '""') + '"' for t in indexed)
+        matches = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"{matches} LIMIT {ID_LIST_LIMIT + 1}", [match])
+            ids = [row[0] for row in cursor.fetchall()]
+        if len(ids) <= ID_LIST_LIMIT:
+            # Few hits: hand SQLite the ids, or it walks the whole date index probing the subquery.
+            queryset = queryset.filter(pk__in=ids)
+        else:
+            queryset = queryset.filter(pk__in=RawSQL(matches, [match]))
+    else:
+        for term in indexed:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT id FROM payments_payment WHERE {PG_DOCUMENT} ILIKE %s", [pattern])
+            )
+
+    # Terms too short for trigrams only narrow the (already small) indexed result.
+    for term in terms:
+        if len(term) < MIN_TRIGRAM:
+            queryset = queryset.filter(
+                Q(student_name__icontains=term) | Q(parent_email__icontains=term) | Q(payment_reference__icontains=term)
+            )
+    return queryset
@@ -0,0 +1,200 @@
+"""
+Payment status transitions shared by the webhook worker, the verify
+redirect and anything else that learns a payment's outcome from the gateway.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import outbox
+from .models import OutboundEmail, Payment, WebhookEvent
+from .references import new_reference
+
+PENDING = "pending"
+SUCCESSFUL = "successful"
+# Gateway statuses that settle a payment; anything else leaves it pending. Only
+# "successful" is final: a parent can retry a declined or cancelled checkout under
+# the same tx_ref, so those payments may still become successful.
+SETTLED_STATUSES = {"successful", "failed", "cancelled"}
+
+
+def create_pending_payment(fields, idempotency_key=None):
+    """
+    Insert a pending payment under a freshly allocated reference.
+
+    A repeated ``idempotency_key`` (double click, resubmitted form, two
+    racing requests) returns the row created first instead of writing a
+    new one. Returns ``(payment, created)``.
+    """
+    if idempotency_key:
+        existing = Payment.objects.filter(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            payment = Payment.objects.create(
+                payment_reference=new_reference(),
+                idempotency_key=idempotency_key or None,
+                status=PENDING,
+                **fields,
+            )
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # Lost the race to a concurrent request with the same key.
+        return Payment.objects.get(idempotency_key=idempotency_key), False
+    return payment, True
+
+
+def apply_gateway_status(reference, status, amount=None, defaults=None):
+    """
+    Record the gateway's verdict for ``reference``.
+
+    A successful payment never moves again and a verdict equal to the
+    current status is a no-op, so replays of the same event are harmless.
+    Pending, failed and cancelled payments take the new verdict (a second
+    card in the same checkout can succeed after the first was declined).
+    When no row exists it is created from ``defaults`` (or skipped if none
+    are given). Returns ``(payment, changed)``.
+    """
+    if status not in SETTLED_STATUSES:
+        return Payment.objects.filter(payment_reference=reference).first(), False
+
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().filter(payment_reference=reference).first()
+
+        if payment is None:
+            if defaults is None:
+                return None, False
+            payment = Payment.objects.create(
+                payment_reference=reference, status=status, amount=amount, **defaults
+            )
+        elif payment.status in (SUCCESSFUL, status):
+            return payment, False
+        else:
+            payment.status = status
+            update_fields = ["status"]
+            if amount is not None:
+                payment.amount = amount
+                update_fields.append("amount")
+            payment.save(update_fields=update_fields)
+
+        if status == SUCCESSFUL:
+            queue_payment_confirmation(payment)
+
+    return payment, True
+
+
+@dataclass
+class WebhookBatch:
+    claimed: int = 0
+    processed: int = 0
+    retried: int = 0
+    dead: int = 0
+
+
+def process_webhook_event(pk, max_attempts=8):
+    """
+    Apply one recorded webhook event and record the outcome on it.
+
+    The row is locked (skipping it if another worker holds it) so each
+    event is applied once. An event that raises is retried with backoff
+    and parked as dead after ``max_attempts``, like an outbox email.
+    Returns the event's new status, or None if it was not due.
+    """
+    with transaction.atomic():
+        event = (
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(pk=pk, status=WebhookEvent.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .first()
+        )
+        if event is None:
+            return None
+
+        event.attempts += 1
+        data = event.payload.get("data") or {}
+        try:
+            with transaction.atomic():
+                if event.tx_ref:
+                    apply_gateway_status(event.tx_ref, data.get("status"), amount=data.get("amount"))
+        except Exception as e:
+            event.last_error = f"{type(e).__name__}: {e}"[:2000]
+            if event.attempts >= max_attempts:
+                event.status = WebhookEvent.STATUS_DEAD
+            else:
+                event.next_attempt_at = timezone.now() + outbox.retry_delay(event.attempts)
+        else:
+            event.status = WebhookEvent.STATUS_PROCESSED
+            event.processed_at = timezone.now()
+            event.last_error = ""
+        event.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "processed_at"])
+    return event.status
+
+
+def process_pending_webhooks(batch_size=100, max_attempts=8):
+    """Apply up to ``batch_size`` due webhook events, oldest first; returns a ``WebhookBatch``."""
+    due = (
+        WebhookEvent.objects.filter(status=WebhookEvent.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+        .order_by("received_at", "pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    result = WebhookBatch()
+    for pk in list(due):
+        status = process_webhook_event(pk, max_attempts=max_attempts)
+        if status is None:
+            continue
+        result.claimed += 1
+        if status == WebhookEvent.STATUS_PROCESSED:
+            result.processed += 1
+        elif status == WebhookEvent.STATUS_DEAD:
+            result.dead += 1
+        else:
+            result.retried += 1
+    return result
+
+
+def apply_recorded_webhooks(reference):
+    """Apply the due webhook events already recorded for ``reference``; returns its payment afterwards."""
+    due = (
+        WebhookEvent.objects.filter(
+            tx_ref=reference, status=WebhookEvent.STATUS_PENDING, next_attempt_at__lte=timezone.now()
+        )
+        .order_by("received_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    for pk in list(due):
+        process_webhook_event(pk)
+    return Payment.objects.filter(payment_reference=reference).first()
+
+
+def queue_payment_confirmation(payment):
+    """Add the confirmation email to the outbox (call inside the status change transaction)."""
+    email = confirmation_email(payment)
+    email.save()
+    return email
+
+
+def confirmation_email(payment):
+    """Build (but do not save) the outbox row confirming ``payment``."""
+    subject = "Payment Confirmation - Sunshine Academy"
+    message = (
+        f"Dear Parent,\n\n"
+        f"Your payment of ₦{payment.amount:,.2f} was successful.\n"
+        f"Student: {payment.student_name}\n"
+        f"Class: {payment.student_class}\n"
+        f"Session: {payment.session}\n"
+        f"Term: {payment.term}\n"
+        f"Reference: {payment.payment_reference}\n\n"
+        f"Thank you for choosing Sunshine Academy.\n\n"
+        f"Best regards,\nSunshine Academy Accounts Office"
+    )
+    return OutboundEmail(
+        payment=payment,
+        subject=subject,
+        body=message,
+        from_email=settings.EMAIL_HOST_USER,
+        to_email=payment.parent_email,
+    )
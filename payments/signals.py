@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import receipt_cache, rollup, search, verification
+from .models import Payment
+
+
+# ✅ Drop cached receipt PDFs and verification details whenever a payment changes or disappears
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_receipt_cache(sender, instance, **kwargs):
+    receipt_cache.invalidate(instance.payment_reference)
+    verification.invalidate(instance.pk)
+
+
+# ✅ Keep the fee-collection rollup in step with every payment write
+@receiver(pre_save, sender=Payment)
+def remember_rollup_state(sender, instance, raw=False, **kwargs):
+    instance._rollup_before = None if raw or instance.pk is None else rollup.stored_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Payment)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollup.apply_changes([(getattr(instance, "_rollup_before", None), rollup.snapshot(instance))])
+
+
+@receiver(post_delete, sender=Payment)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollup.apply_changes([(rollup.snapshot(instance), None)])
+
+
+# ✅ Create the admin search index (FTS5 / pg_trgm) once the tables exist
+@receiver(post_migrate)
+def install_search_index(sender, using="default", **kwargs):
+    if sender.name == "payments":
+        search.install(using)
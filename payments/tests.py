@@ -0,0 +1,183 @@
+import asyncio
+import json
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import exports, gateway, services
+from .models import OutboundEmail, Payment, WebhookEvent
+
+WEBHOOK_SECRET = "test-webhook-secret"
+
+
+@override_settings(FLW_SECRET_HASH=WEBHOOK_SECRET)
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.payment = Payment.objects.create(
+            student_name="Ada Obi", student_class="Primary 1", session="2025/2026", term="First Term",
+            parent_email="parent@example.com", amount=1000, payment_reference="SCH-TEST-1", status="pending",
+        )
+
+    def post_event(self, transaction_id, status, amount=1000):
+        event = {
+            "event": "charge.completed",
+            "data": {"id": transaction_id, "tx_ref": self.payment.payment_reference,
+                     "status": status, "amount": amount},
+        }
+        return self.client.post(reverse("flutterwave_webhook"), json.dumps(event),
+                                content_type="application/json", headers={"verif-hash": WEBHOOK_SECRET})
+
+    def test_webhook_is_acknowledged_before_processing(self):
+        self.assertEqual(self.post_event(101, "successful").json(), {"status": "ok", "duplicate": False})
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "pending")
+
+        self.assertEqual(services.process_pending_webhooks().processed, 1)
+        self.assertEqual(services.process_pending_webhooks().claimed, 0)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "successful")
+
+    def test_verify_applies_a_recorded_webhook_without_asking_the_gateway(self):
+        self.post_event(101, "successful")
+        # No transaction_id: reaching the gateway would end on "Transaction ID missing"
+        response = self.client.get(reverse("verify_payment"), {"tx_ref": self.payment.payment_reference})
+        self.assertTemplateUsed(response, "payments/payment_success.html")
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.STATUS_PROCESSED)
+
+    def test_failing_event_is_retried_then_parked_without_blocking_others(self):
+        other = Payment.objects.create(
+            student_name="Bola Obi", student_class="Primary 2", session="2025/2026", term="First Term",
+            parent_email="parent@example.com", amount=1000, payment_reference="SCH-TEST-2", status="pending",
+        )
+        self.post_event(101, "successful", amount="12,000")  # received first, fails on save
+        self.payment = other
+        self.post_event(102, "successful")
+
+        result = services.process_pending_webhooks(max_attempts=2)
+        self.assertEqual((result.processed, result.retried, result.dead), (1, 1, 0))
+        other.refresh_from_db()
+        self.assertEqual(other.status, "successful")
+
+        bad = WebhookEvent.objects.get(event_id="charge.completed:101")
+        self.assertIn("ValidationError", bad.last_error)
+        WebhookEvent.objects.filter(pk=bad.pk).update(next_attempt_at=bad.received_at)  # backoff elapsed
+        self.assertEqual(services.process_pending_webhooks(max_attempts=2).dead, 1)
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (WebhookEvent.STATUS_DEAD, 2))
+
+    def test_declined_card_then_successful_retry(self):
+        # The parent's first card is declined, the second one in the same checkout goes through
+        self.assertEqual(self.post_event(101, "failed").status_code, 200)
+        services.process_pending_webhooks()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "failed")
+
+        self.assertEqual(self.post_event(102, "successful").status_code, 200)
+        services.process_pending_webhooks()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "successful")
+        self.assertEqual(OutboundEmail.objects.filter(payment=self.payment).count(), 1)
+
+    def test_successful_payment_is_final(self):
+        self.post_event(101, "successful")
+        self.post_event(102, "failed")
+        self.post_event(101, "successful")  # redelivery
+        services.process_pending_webhooks()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "successful")
+        self.assertEqual(OutboundEmail.objects.filter(payment=self.payment).count(), 1)
+
+
+class ResumeCheckoutTests(TestCase):
+    def confirm(self):
+        self.client.post(reverse("pay_fees"), {
+            "student_name": "Ada Obi", "session": "2025/2026", "student_class": "Primary 1",
+            "term": "First Term", "parent_email": "parent@example.com", "amount": "1000",
+        })
+        return self.client.session["payment_data"]["idempotency_key"]
+
+    def test_resubmitting_after_a_declined_card_returns_to_checkout(self):
+        key = self.confirm()
+        Payment.objects.create(
+            student_name="Ada Obi", student_class="Primary 1", session="2025/2026", term="First Term",
+            parent_email="parent@example.com", amount=1000, payment_reference="SCH-TEST-1", status="failed",
+            idempotency_key=key, checkout_link="https://checkout.test/SCH-TEST-1",
+        )
+        response = self.client.post(reverse("initialize_payment"), {"idempotency_key": key})
+        self.assertRedirects(response, "https://checkout.test/SCH-TEST-1", fetch_redirect_response=False)
+
+    def test_resubmitting_a_successful_payment_shows_it(self):
+        key = self.confirm()
+        Payment.objects.create(
+            student_name="Ada Obi", student_class="Primary 1", session="2025/2026", term="First Term",
+            parent_email="parent@example.com", amount=1000, payment_reference="SCH-TEST-1",
+            status="successful", idempotency_key=key,
+        )
+        response = self.client.post(reverse("initialize_payment"), {"idempotency_key": key}, follow=True)
+        self.assertTemplateUsed(response, "payments/payment_success.html")
+
+
+class VerifyTests(TestCase):
+    def test_non_numeric_transaction_id_never_reaches_the_gateway(self):
+        for transaction_id in ("../../balances", "1?currency=NGN", "1#", "١٢"):
+            response = self.client.get(reverse("verify_payment"), {"tx_ref": "SCH-MISSING",
+                                                                   "transaction_id": transaction_id})
+            self.assertEqual(response.status_code, 400)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_cancelled_half_open_probe_releases_the_breaker(self):
+        import httpx
+
+        started = asyncio.Event()
+
+        async def hang(request):
+            started.set()
+            await asyncio.sleep(3600)
+
+        breaker = gateway.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()  # open; with no reset timeout the next call is the half-open probe
+
+        async def cancel_probe():
+            client = gateway.AsyncFlutterwaveClient("http://gateway.test", "secret", breaker=breaker)
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(hang))
+            probe = asyncio.create_task(client.verify_transaction(1))
+            await started.wait()
+            self.assertFalse(breaker.allow())  # only one probe at a time
+            probe.cancel()  # the parent closed the tab
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+            await client.aclose()
+
+        asyncio.run(cancel_probe())
+        self.assertTrue(breaker.allow())
+
+
+class InFlightLimitTests(SimpleTestCase):
+    def test_cap_is_shared_by_every_worker(self):
+        cache.clear()
+        # One instance per worker process, counting in the same cache
+        first, second = gateway.SharedInFlightLimit(1), gateway.SharedInFlightLimit(1)
+        with first.slot():
+            with self.assertRaises(gateway.GatewayBusy):
+                second.check()
+            with self.assertRaises(gateway.GatewayBusy), second.slot():
+                pass
+
+        with second.slot():
+            self.assertEqual(first.count(), 1)
+        self.assertEqual(first.count(), 0)
+
+
+class ExportTests(TestCase):
+    def test_formula_cells_are_written_as_text(self):
+        Payment.objects.create(
+            student_name='=HYPERLINK("http://evil.test")', student_class="Primary 1", session="2025/2026",
+            term="First Term", parent_email="@evil.test", amount=1000, payment_reference="SCH-TEST-1",
+        )
+        row = next(exports.export_rows(Payment.objects.all()))
+        self.assertEqual(row[1], '\'=HYPERLINK("http://evil.test")')
+        self.assertEqual(row[5], "'@evil.test")
+        self.assertEqual(row[0], "SCH-TEST-1")
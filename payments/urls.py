@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# ✅ Under ASGI the gateway-bound steps run as async views (see school_portal/asgi.py)
+if settings.ASYNC_PAYMENT_VIEWS:
+    initialize_view, verify_view = views.initialize_payment_async, views.verify_payment_async
+else:
+    initialize_view, verify_view = views.initialize_payment, views.verify_payment
+
 urlpatterns = [
     path("pay/", views.pay_fees, name="pay_fees"),  # Step 1: Show and confirm payment
-    path("initialize/", views.initialize_payment, name="initialize_payment"),  # Step 2: Process payment
-    path("verify/", views.verify_payment, name="verify_payment"),  # Step 3: Verify payment
+    path("initialize/", initialize_view, name="initialize_payment"),  # Step 2: Process payment
+    path("verify/", verify_view, name="verify_payment"),  # Step 3: Verify payment
+    path("webhook/flutterwave/", views.flutterwave_webhook, name="flutterwave_webhook"),  # Gateway push confirmation
     path("receipt/<str:reference>/", views.download_receipt, name="download_receipt"),
     path("about/", views.about, name="about"),
 ]
@@ -2,68 +2,118 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from io import BytesIO
 from .models import Payment
+from .verification import verification_url
 import qrcode
 from reportlab.lib.utils import ImageReader
+from reportlab import rl_config
+
+# Embed images as raw binary streams instead of ASCII85 text: smaller PDFs
+# and no pure-Python encoding pass per receipt.
+rl_config.useA85 = 0
+
+WIDTH, HEIGHT = A4
+
+# Left column of the details block; values are drawn per payment beside them.
+DETAIL_LABELS = [
+    "Student Name:",
+    "Academic Session:",
+    "Class:",
+    "Term:",
+    "Parent Email:",
+    "Amount Paid:",
+    "Payment Reference:",
+    "Status:",
+    "Date:",
+]
 
 
 def generate_receipt_pdf(reference):
     payment = Payment.objects.get(payment_reference=reference)
+    return render_receipt_pdf(payment)
+
+
+def render_receipt_pdf(payment):
+    """Draw the receipt for an already-loaded ``Payment`` into a BytesIO."""
+    fields = receipt_fields(payment)
 
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
+    draw_receipt_layout(p)
+    draw_receipt_fields(p, fields, ImageReader(BytesIO(qr_png(fields))))
+
+    # Finalize PDF
+    p.showPage()
+    p.save()
 
+    buffer.seek(0)
+    return buffer
+
+
+def receipt_fields(payment):
+    """The per-payment values printed on a receipt, as plain strings."""
+    return {
+        "student_name": payment.student_name,
+        "session": payment.session,
+        "student_class": payment.student_class,
+        "term": payment.term,
+        "parent_email": payment.parent_email,
+        "amount": f"₦{payment.amount:,.2f}",
+        "payment_reference": payment.payment_reference,
+        "status": payment.status,
+        "date": payment.date.strftime("%Y-%m-%d %H:%M"),
+        "verification_url": verification_url(payment.pk),
+    }
+
+
+def draw_receipt_layout(p):
+    """Everything on the page that is the same for every receipt."""
     # === HEADER ===
     p.setFont("Helvetica-Bold", 20)
-    p.drawCentredString(width / 2, height - 80, "Sunshine Academy")
+    p.drawCentredString(WIDTH / 2, HEIGHT - 80, "Sunshine Academy")
 
     p.setFont("Helvetica", 12)
-    p.drawCentredString(width / 2, height - 100, "Official Payment Receipt")
+    p.drawCentredString(WIDTH / 2, HEIGHT - 100, "Official Payment Receipt")
 
-    # === PAYMENT DETAILS ===
-    y = height - 160
-    details = [
-        ("Student Name:", payment.student_name),
-        ("Academic Session:", payment.session),
-        ("Class:", payment.student_class),
-        ("Term:", payment.term),
-        ("Parent Email:", payment.parent_email),
-        ("Amount Paid:", f"₦{payment.amount:,.2f}"),
-        ("Payment Reference:", payment.payment_reference),
-        ("Status:", payment.status),
-        ("Date:", payment.date.strftime("%Y-%m-%d %H:%M")),
-    ]
-
-    for label, value in details:
-        p.setFont("Helvetica-Bold", 11)
-        p.drawString(80, y, f"{label}")
-        p.setFont("Helvetica", 11)
-        p.drawString(220, y, str(value))
+    # === PAYMENT DETAIL LABELS ===
+    y = HEIGHT - 160
+    p.setFont("Helvetica-Bold", 11)
+    for label in DETAIL_LABELS:
+        p.drawString(80, y, label)
         y -= 25
 
-    # === QR CODE (with verification URL) ===
-    verification_url = f"https://school-payment-portal.onrender.com/payments/receipt/{payment.payment_reference}/"
-    qr_data = f"Verify Payment Online:\n{verification_url}\n\nStudent: {payment.student_name}\nAmount: ₦{payment.amount:,.2f}\nStatus: {payment.status}"
+    # === FOOTER ===
+    p.setFont("Helvetica-Oblique", 10)
+    p.drawCentredString(WIDTH / 2, 80, "Scan the QR code to verify this payment online.")
+    p.drawCentredString(WIDTH / 2, 65, "This is a system-generated receipt. No signature required.")
 
-    qr_image = qrcode.make(qr_data)
 
-    # ✅ Convert QR code image to bytes
-    qr_bytes = BytesIO()
-    qr_image.save(qr_bytes, format="PNG")
-    qr_bytes.seek(0)
-    qr_reader = ImageReader(qr_bytes)
+def draw_receipt_fields(p, fields, qr_reader):
+    """Overlay one payment's values and QR code on the layout."""
+    # === PAYMENT DETAILS ===
+    y = HEIGHT - 160
+    p.setFont("Helvetica", 11)
+    for key in ("student_name", "session", "student_class", "term", "parent_email",
+                "amount", "payment_reference", "status", "date"):
+        p.drawString(220, y, str(fields[key]))
+        y -= 25
 
     # Draw QR code on the PDF
-    p.drawImage(qr_reader, width - 200, height - 250, 100, 100)
+    p.drawImage(qr_reader, WIDTH - 200, HEIGHT - 250, 100, 100)
 
-    # === FOOTER ===
-    p.setFont("Helvetica-Oblique", 10)
-    p.drawCentredString(width / 2, 80, "Scan the QR code to verify this payment online.")
-    p.drawCentredString(width / 2, 65, "This is a system-generated receipt. No signature required.")
 
-    # Finalize PDF
-    p.showPage()
-    p.save()
+def qr_png(fields):
+    """Encode the verification QR code for a receipt as PNG bytes."""
+    # === QR CODE (with verification URL) ===
+    # ✅ Only the short signed URL: scanning it shows the live status (see accounts.views.verify_receipt),
+    # and the smaller payload means a smaller, faster-to-encode code
 
-    buffer.seek(0)
-    return buffer
+    # Small modules: the code is scaled to 100pt on the page anyway, and a
+    # smaller bitmap is much cheaper to encode and embed.
+    qr = qrcode.QRCode(box_size=4, border=2)
+    qr.add_data(fields["verification_url"])
+    qr_image = qr.make_image()
+
+    # ✅ Convert QR code image to bytes
+    qr_bytes = BytesIO()
+    qr_image.save(qr_bytes, format="PNG")
+    return qr_bytes.getvalue()
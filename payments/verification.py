@@ -0,0 +1,67 @@
+"""
+Receipt verification from the QR code printed on every receipt.
+
+The QR code carries a short signed token for the payment's primary key
+(``/r/<token>/``) instead of the full receipt URL, so a scan can be
+checked without rendering a PDF and a token cannot be forged or walked
+to other payments. The small public summary a scan shows is cached and
+dropped whenever the payment is saved or deleted (see
+``payments.signals``).
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Payment
+
+SALT = "payments.receipt-verification"
+CACHE_PREFIX = "receipt-verify"
+
+# Stored in the cache for tokens whose payment no longer exists.
+MISSING = "missing"
+
+SUMMARY_FIELDS = ("payment_reference", "student_name", "student_class", "session", "term",
+                  "amount", "status", "date")
+
+_signer = signing.Signer(salt=SALT)
+
+
+def make_token(pk):
+    return _signer.sign(signing.b62_encode(pk))
+
+
+def payment_id(token):
+    """Return the payment pk a token was issued for, or ``None`` if it is not genuine."""
+    try:
+        return signing.b62_decode(_signer.unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def verification_url(pk):
+    """Absolute URL for the QR code; ``SITE_URL`` is the public origin of the portal."""
+    return settings.SITE_URL.rstrip("/") + reverse("verify_receipt", args=[make_token(pk)])
+
+
+def _cache_key(pk):
+    return f"{CACHE_PREFIX}:{pk}"
+
+
+def summary(pk):
+    """The public verification details for payment ``pk`` (cached), or ``None``."""
+    key = _cache_key(pk)
+    cached = cache.get(key)
+    if cached is None:
+        row = Payment.objects.filter(pk=pk).values(*SUMMARY_FIELDS).first()
+        cached = MISSING if row is None else {
+            **row,
+            "amount": f"{row['amount']:,.2f}",
+            "date": row["date"].strftime("%Y-%m-%d %H:%M"),
+        }
+        cache.set(key, cached, settings.RECEIPT_VERIFY_CACHE_SECONDS)
+    return None if cached == MISSING else cached
+
+
+def invalidate(pk):
+    cache.delete(_cache_key(pk))
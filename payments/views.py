@@ -1,17 +1,33 @@
-import sys
-import requests
-from django.shortcuts import render, redirect
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from datetime import timedelta
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import send_mail
-from .models import Payment
-from .utils import generate_receipt_pdf
+from django.views.decorators.http import require_POST
+from .models import Payment, WebhookEvent
+from . import gateway, receipt_cache, services
+from school_portal.decorators import public_page
+from school_portal.ratelimit import ratelimit
+
+logger = logging.getLogger(__name__)
 
 
 # ===========================================
 # PAY FORM VIEW
 # ===========================================
+@ratelimit("pay")
 def pay_fees(request):
     if request.method == 'POST':
         student_name = request.POST.get('student_name')
@@ -31,6 +47,8 @@ def pay_fees(request):
             'term': term,
             'parent_email': parent_email,
             'amount': amount,
+            # ✅ New key per confirmation page; resubmitting that page reuses the same payment
+            'idempotency_key': uuid.uuid4().hex,
         }
         request.session['payment_data'] = context
 
@@ -42,49 +60,43 @@ def pay_fees(request):
 # ===========================================
 # INITIALIZE PAYMENT
 # ===========================================
-@csrf_exempt
-def initialize_payment(request):
-    print("📢 initialize_payment() triggered", file=sys.stderr)
+def _checkout_details(request, data):
+    """Validate the wizard's session data; return ``(idempotency_key, pending_payment_fields)``."""
+    key = data.get('idempotency_key')
+    posted_key = request.POST.get('idempotency_key')
+    if posted_key and posted_key != key:
+        # The session now holds a different confirmation (e.g. another tab)
+        raise ValueError("This payment form has expired. Please start the payment again.")
 
-    data = request.session.get('payment_data', {})
     email = data.get('parent_email')
     amount = data.get('amount')
 
     if not email or not amount:
-        return render(request, "error.html", {"message": "Missing required fields"})
+        raise ValueError("Missing required fields")
 
     try:
         amount = float(amount)
     except ValueError:
-        return render(request, "error.html", {"message": "Invalid amount format"})
-
-    # Generate unique reference
-    tx_ref = f"TX-{email.replace('@', '_')}"
+        raise ValueError("Invalid amount format")
+
+    fields = {
+        "student_name": data.get("student_name"),
+        "student_class": data.get("student_class"),
+        "session": data.get("session"),
+        "term": data.get("term"),
+        "parent_email": email,
+        "amount": amount,
+    }
+    return key, fields
 
-    # ✅ Save payment with pending status
-    Payment.objects.update_or_create(
-        payment_reference=tx_ref,
-        defaults={
-            "student_name": data.get("student_name"),
-            "student_class": data.get("student_class"),
-            "session": data.get("session"),
-            "term": data.get("term"),
-            "parent_email": email,
-            "amount": amount,
-            "status": "pending",
-        },
-    )
 
-    headers = {
-        "Authorization": f"Bearer {settings.FLW_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "tx_ref": tx_ref,
-        "amount": amount,
+def _checkout_payload(payment):
+    return {
+        "tx_ref": payment.payment_reference,
+        "amount": float(payment.amount),
         "currency": "NGN",
         "redirect_url": "https://school-payment-portal.onrender.com/payments/verify/",
-        "customer": {"email": email, "phonenumber": "", "name": data.get("student_name")},
+        "customer": {"email": payment.parent_email, "phonenumber": "", "name": payment.student_name},
         "customizations": {
             "title": "Sunshine Academy Payment",
             "description": "School fee payment for student",
@@ -92,109 +104,305 @@ def initialize_payment(request):
         },
     }
 
-    try:
-        res = requests.post("https://api.flutterwave.com/v3/payments", headers=headers, json=payload, timeout=10)
-        result = res.json()
-    except Exception as e:
-        return render(request, "error.html", {"message": f"Flutterwave request failed: {e}"})
 
+def _resume_checkout(request, payment):
+    """Answer a repeated submission for ``payment``; None means the gateway should be (re)tried."""
+    if payment.status == services.SUCCESSFUL:
+        query = urlencode({"tx_ref": payment.payment_reference})
+        return redirect(f"{reverse('verify_payment')}?{query}")
+    if payment.checkout_link:
+        # Pending, or declined/cancelled: the parent can (re)try a card on the same checkout
+        return redirect(payment.checkout_link)
+    if payment.status != services.PENDING:
+        return None
+    in_flight = timedelta(seconds=settings.FLW_CONNECT_TIMEOUT + settings.FLW_READ_TIMEOUT)
+    if timezone.now() - payment.date < in_flight:
+        # The first submission is still talking to the gateway
+        return render(request, "error.html", {
+            "message": "Your payment is already being set up. Please wait a moment and try again."
+        }, status=409)
+    return None
+
+
+def _gateway_unavailable(request, e):
+    """Fast "try again" page when the breaker is open or too many gateway calls are in flight."""
+    response = render(request, "error.html", {"title": "Please Try Again", "message": str(e)}, status=503)
+    response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def _checkout_link(request, result):
+    """Return ``(link, error_response)`` for the gateway's initialize response."""
     if result.get("status") == "success":
-        return redirect(result["data"]["link"])
+        return result["data"]["link"], None
     else:
-        return render(request, "error.html", {"message": f"Flutterwave Error: {result.get('message')}"})
+        return None, render(request, "error.html", {"message": f"Flutterwave Error: {result.get('message')}"})
+
+
+@csrf_exempt
+@ratelimit("initialize")
+def initialize_payment(request):
+    logger.debug("initialize_payment() triggered")
+
+    try:
+        key, fields = _checkout_details(request, request.session.get('payment_data', {}))
+    except ValueError as e:
+        return render(request, "error.html", {"message": str(e)})
+
+    client = gateway.get_client()
+    try:
+        client.in_flight.check()  # ✅ shed load before writing anything
+    except gateway.GatewayBusy as e:
+        return _gateway_unavailable(request, e)
+
+    # ✅ Save payment with pending status (or find the one this form already created)
+    payment, created = services.create_pending_payment(fields, key)
+    if not created:
+        response = _resume_checkout(request, payment)
+        if response is not None:
+            return response
+
+    try:
+        result = client.initialize_payment(_checkout_payload(payment))
+    except gateway.GatewayUnavailable as e:
+        return _gateway_unavailable(request, e)
+    except gateway.GatewayError as e:
+        return render(request, "error.html", {"message": f"Flutterwave request failed: {e}"})
+
+    link, error = _checkout_link(request, result)
+    if error:
+        return error
+    Payment.objects.filter(pk=payment.pk).update(checkout_link=link)
+    return redirect(link)
+
+
+@csrf_exempt
+@ratelimit("initialize")
+async def initialize_payment_async(request):
+    """``initialize_payment`` for ASGI: the worker is free while Flutterwave answers."""
+    logger.debug("initialize_payment_async() triggered")
+
+    try:
+        key, fields = _checkout_details(request, await request.session.aget('payment_data', {}))
+    except ValueError as e:
+        return render(request, "error.html", {"message": str(e)})
+
+    client = gateway.get_async_client()
+    try:
+        client.in_flight.check()
+    except gateway.GatewayBusy as e:
+        return _gateway_unavailable(request, e)
+
+    payment, created = await sync_to_async(services.create_pending_payment)(fields, key)
+    if not created:
+        response = _resume_checkout(request, payment)
+        if response is not None:
+            return response
+
+    try:
+        result = await client.initialize_payment(_checkout_payload(payment))
+    except gateway.GatewayUnavailable as e:
+        return _gateway_unavailable(request, e)
+    except gateway.GatewayError as e:
+        return render(request, "error.html", {"message": f"Flutterwave request failed: {e}"})
+
+    link, error = _checkout_link(request, result)
+    if error:
+        return error
+    await Payment.objects.filter(pk=payment.pk).aupdate(checkout_link=link)
+    return redirect(link)
 
 
 
 # ===========================================
 # VERIFY PAYMENT
 # ===========================================
+def _fallback_defaults(session_data, data):
+    # Fallback (if the pending row is missing, e.g. session lost)
+    if data.get("status") != services.SUCCESSFUL:
+        return None
+    return {
+        "student_name": session_data.get("student_name", "Unknown"),
+        "student_class": session_data.get("student_class", "N/A"),
+        "session": session_data.get("session", ""),
+        "term": session_data.get("term", ""),
+        "parent_email": session_data.get("parent_email", (data.get("customer") or {}).get("email")),
+    }
+
+
+def _valid_transaction_id(transaction_id):
+    # ✅ It goes into the gateway's URL path: only Flutterwave's numeric ids get that far
+    return transaction_id.isascii() and transaction_id.isdigit()
+
+
+def _verification_result(request, payment):
+    if payment is None or payment.status != services.SUCCESSFUL:
+        return render(request, "payments/payment_failed.html")
+
+    context = {
+        "reference": payment.payment_reference,
+        "amount": payment.amount,
+        "email": payment.parent_email,
+        "student_name": payment.student_name,
+        "student_class": payment.student_class,
+        "session": payment.session,
+        "term": payment.term,
+    }
+    return render(request, "payments/payment_success.html", context)
+
+
+@ratelimit("verify")
 def verify_payment(request):
-    print("📢 verify_payment() triggered", file=sys.stderr)
+    logger.debug("verify_payment() triggered")
 
+    reference = request.GET.get("tx_ref")
     transaction_id = request.GET.get("transaction_id")
-    if not transaction_id:
-        return render(request, "error.html", {"message": "Transaction ID missing"})
 
-    headers = {
-        "Authorization": f"Bearer {settings.FLW_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-    url = f"https://api.flutterwave.com/v3/transactions/{transaction_id}/verify"
+    # ✅ Normally the webhook has already confirmed the payment: just read it
+    payment = Payment.objects.filter(payment_reference=reference).first() if reference else None
+    if reference and (payment is None or payment.status != services.SUCCESSFUL):
+        # The webhook may be recorded but not yet applied by the worker
+        payment = services.apply_recorded_webhooks(reference)
+
+    if payment is None or payment.status != services.SUCCESSFUL:
+        # Webhook not in yet (or never coming), or an earlier attempt in this checkout
+        # failed — ask the gateway ourselves
+        if not transaction_id:
+            return render(request, "error.html", {"message": "Transaction ID missing"})
+        if not _valid_transaction_id(transaction_id):
+            return render(request, "error.html", {"message": "Invalid transaction ID"}, status=400)
+
+        try:
+            response_data = gateway.get_client().verify_transaction(transaction_id)
+        except gateway.GatewayUnavailable as e:
+            return _gateway_unavailable(request, e)
+        except gateway.GatewayError as e:
+            return render(request, "error.html", {"message": f"Verification failed: {e}"})
+
+        data = response_data.get("data") or {}
+        if data.get("tx_ref"):
+            payment, _ = services.apply_gateway_status(
+                data["tx_ref"],
+                data.get("status"),
+                amount=data.get("amount"),
+                defaults=_fallback_defaults(request.session.get("payment_data", {}), data),
+            )
 
-    try:
-        res = requests.get(url, headers=headers, timeout=10)
-        response_data = res.json()
-    except Exception as e:
-        return render(request, "error.html", {"message": f"Verification failed: {e}"})
-
-    data = response_data.get("data", {})
-    if data.get("status") == "successful":
-        reference = data.get("tx_ref")
-        amount = data.get("amount")
-
-        # ✅ Get existing payment
-        payment = Payment.objects.filter(payment_reference=reference).first()
-        if payment:
-            payment.status = "successful"
-            payment.amount = amount
-            payment.save()
-        else:
-            # Fallback (if session lost)
-            session_data = request.session.get("payment_data", {})
-            payment = Payment.objects.create(
-                student_name=session_data.get("student_name", "Unknown"),
-                student_class=session_data.get("student_class", "N/A"),
-                session=session_data.get("session", ""),
-                term=session_data.get("term", ""),
-                parent_email=session_data.get("parent_email", data.get("customer", {}).get("email")),
-                amount=amount,
-                payment_reference=reference,
-                status="successful",
+    return _verification_result(request, payment)
+
+
+@ratelimit("verify")
+async def verify_payment_async(request):
+    """``verify_payment`` for ASGI: the worker is free while Flutterwave answers."""
+    logger.debug("verify_payment_async() triggered")
+
+    reference = request.GET.get("tx_ref")
+    transaction_id = request.GET.get("transaction_id")
+
+    payment = await Payment.objects.filter(payment_reference=reference).afirst() if reference else None
+    if reference and (payment is None or payment.status != services.SUCCESSFUL):
+        payment = await sync_to_async(services.apply_recorded_webhooks)(reference)
+
+    if payment is None or payment.status != services.SUCCESSFUL:
+        if not transaction_id:
+            return render(request, "error.html", {"message": "Transaction ID missing"})
+        if not _valid_transaction_id(transaction_id):
+            return render(request, "error.html", {"message": "Invalid transaction ID"}, status=400)
+
+        try:
+            response_data = await gateway.get_async_client().verify_transaction(transaction_id)
+        except gateway.GatewayUnavailable as e:
+            return _gateway_unavailable(request, e)
+        except gateway.GatewayError as e:
+            return render(request, "error.html", {"message": f"Verification failed: {e}"})
+
+        data = response_data.get("data") or {}
+        if data.get("tx_ref"):
+            # Row lock + rollup/outbox side effects stay in one sync transaction
+            payment, _ = await sync_to_async(services.apply_gateway_status)(
+                data["tx_ref"],
+                data.get("status"),
+                amount=data.get("amount"),
+                defaults=_fallback_defaults(await request.session.aget("payment_data", {}), data),
             )
 
-        # ✅ Email confirmation
-        subject = "Payment Confirmation - Sunshine Academy"
-        message = (
-            f"Dear Parent,\n\n"
-            f"Your payment of ₦{amount:,.2f} was successful.\n"
-            f"Student: {payment.student_name}\n"
-            f"Class: {payment.student_class}\n"
-            f"Session: {payment.session}\n"
-            f"Term: {payment.term}\n"
-            f"Reference: {reference}\n\n"
-            f"Thank you for choosing Sunshine Academy.\n\n"
-            f"Best regards,\nSunshine Academy Accounts Office"
-        )
-        send_mail(subject, message, settings.EMAIL_HOST_USER, [payment.parent_email], fail_silently=True)
+    return _verification_result(request, payment)
 
-        context = {
-            "reference": reference,
-            "amount": amount,
-            "email": payment.parent_email,
-            "student_name": payment.student_name,
-            "student_class": payment.student_class,
-            "session": payment.session,
-            "term": payment.term,
-        }
-        return render(request, "payments/payment_success.html", context)
 
-    else:
-        return render(request, "payments/payment_failed.html")
+# ===========================================
+# FLUTTERWAVE WEBHOOK
+# ===========================================
+@csrf_exempt
+@require_POST
+def flutterwave_webhook(request):
+    if not _valid_webhook_signature(request):
+        return HttpResponse(status=401)
+
+    try:
+        event = json.loads(request.body)
+        data = event.get("data") or {}
+        event_id = f"{event.get('event', '')}:{data['id']}"
+    except (ValueError, AttributeError, KeyError, TypeError):
+        return HttpResponseBadRequest("Malformed webhook payload")
+
+    # ✅ Record and acknowledge only: the gateway times out slow webhooks, so the
+    # status change and confirmation email are applied by `manage.py process_webhooks`
+    _, created = WebhookEvent.objects.get_or_create(
+        event_id=event_id,
+        defaults={
+            "event_type": event.get("event", ""),
+            "tx_ref": data.get("tx_ref", ""),
+            "payload": event,
+        },
+    )
+
+    return JsonResponse({"status": "ok", "duplicate": not created})
+
+
+def _valid_webhook_signature(request):
+    secret_hash = settings.FLW_SECRET_HASH
+    if not secret_hash:
+        return False
+
+    # Newer webhooks sign the body (HMAC-SHA256, base64); older ones echo the secret hash.
+    signature = request.headers.get("flutterwave-signature")
+    if signature:
+        digest = hmac.new(secret_hash.encode(), request.body, hashlib.sha256).digest()
+        return hmac.compare_digest(signature, base64.b64encode(digest).decode())
+    return hmac.compare_digest(request.headers.get("verif-hash", ""), secret_hash)
 
 
 
 # ===========================================
 # DOWNLOAD RECEIPT
 # ===========================================
+@ratelimit("receipt")
 def download_receipt(request, reference):
-    pdf_buffer = generate_receipt_pdf(reference)
-    response = HttpResponse(pdf_buffer, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename=\"Receipt_{reference}.pdf\"'
+    payment = get_object_or_404(Payment, payment_reference=reference)
+    receipt = receipt_cache.get_or_render(payment)
+
+    # ✅ Let browsers revalidate instead of downloading the same PDF again
+    response = get_conditional_response(
+        request, etag=receipt.etag, last_modified=int(receipt.last_modified)
+    )
+    if response is None:
+        response = FileResponse(
+            receipt.file,
+            as_attachment=True,
+            filename=f"Receipt_{reference}.pdf",
+            content_type="application/pdf",
+        )
+    else:
+        receipt.file.close()
+    response["ETag"] = receipt.etag
+    response["Last-Modified"] = http_date(receipt.last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
 # ===========================================
 # ABOUT PAGE
 # ===========================================
+@public_page
 def about(request):
     return render(request, "about.html")
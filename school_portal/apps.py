@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+class SchoolPortalConfig(AppConfig):
+    name = 'school_portal'
+
+    def ready(self):
+        from . import signals  # noqa: F401
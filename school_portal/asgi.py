@@ -0,0 +1,18 @@
+"""
+ASGI config for school_portal project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through here switches the payment initialize/verify views to their
+async versions, so a worker waiting on Flutterwave can keep serving others::
+
+    gunicorn school_portal.asgi:application -k uvicorn_worker.UvicornWorker
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school_portal.settings')
+os.environ.setdefault('ASYNC_PAYMENT_VIEWS', 'True')
+
+application = get_asgi_application()
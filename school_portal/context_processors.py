@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def assets(request):
+    # ✅ base.html switches from the Tailwind Play CDN to the compiled stylesheet
+    return {"USE_COMPILED_TAILWIND": settings.USE_COMPILED_TAILWIND}
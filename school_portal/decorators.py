@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.views.decorators.cache import cache_control, cache_page
+
+
+def public_page(view):
+    """
+    Serve a page with no per-user content from the shared page cache, and
+    let browsers and proxies keep it for ``PUBLIC_PAGE_CACHE_SECONDS``.
+    ETag/304 handling comes from ``ConditionalGetMiddleware``.
+
+    Only for views that never touch ``request.user``/``request.session``:
+    a response that varies on the session cookie would be cached per visitor.
+    """
+    timeout = settings.PUBLIC_PAGE_CACHE_SECONDS
+    return cache_control(public=True)(cache_page(timeout, key_prefix="public")(view))
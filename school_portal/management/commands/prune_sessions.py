@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches. Unlike `clearsessions`, this never "
+        "issues one huge DELETE that locks the sessions table during peak traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        if not settings.SESSION_ENGINE.endswith((".db", ".cached_db")):
+            self.stdout.write(f"{settings.SESSION_ENGINE} keeps no session rows; nothing to prune.")
+            return
+
+        now = timezone.now()
+        deleted = 0
+        started = time.perf_counter()
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now).values_list("session_key", flat=True)[: options["batch_size"]]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Pruned {deleted} expired session(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,149 @@
+"""
+In-process performance metrics, exposed in Prometheus text format.
+
+Each worker process keeps its own histograms (a scraper sees one worker
+per scrape, as with any per-process Prometheus client). Record timings
+with ``observe`` or the ``timer`` context manager; ``render`` produces the
+text served by the ``/metrics/`` view.
+
+Database queries are counted by a wrapper on every connection (installed
+by ``school_portal.signals``) into the dict passed to ``count_queries``.
+It is held in a context variable rather than wrapped around the serving
+thread's connections because under ASGI the ORM runs in ``sync_to_async``
+threads, which inherit the request's context but not its connections.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HELP = {
+    "http_request_duration_seconds": "Wall time per request, by view.",
+    "db_queries_per_request": "Database queries issued per request, by view.",
+    "db_time_per_request_seconds": "Total database time per request, by view.",
+    "gateway_request_duration_seconds": "Outbound Flutterwave API calls.",
+    "smtp_send_duration_seconds": "Time to hand one email to the SMTP server.",
+    "receipt_render_duration_seconds": "Time to render receipt PDFs.",
+}
+BUCKETS = {
+    "db_queries_per_request": COUNT_BUCKETS,
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted(
+                (name, labels, h.buckets, list(h.counts), h.sum, h.count)
+                for (name, labels), h in self._histograms.items()
+            )
+
+        lines = []
+        current = None
+        for name, labels, buckets, counts, total, count in snapshot:
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in pairs
+    )
+    return "{" + body + "}"
+
+
+registry = Registry()
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Time the block into histogram ``name``; an ``outcome`` label records ok/error."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        registry.observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+
+def render():
+    return registry.render()
+
+
+_query_counts = ContextVar("query_counts", default=None)
+
+
+@contextmanager
+def count_queries(db):
+    """Add the number and total time of the queries run inside the block to ``db``."""
+    token = _query_counts.set(db)
+    try:
+        yield
+    finally:
+        _query_counts.reset(token)
+
+
+def query_counter(execute, sql, params, many, context):
+    """``connection.execute_wrappers`` hook feeding ``count_queries``."""
+    db = _query_counts.get()
+    if db is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        db["queries"] += 1
+        db["seconds"] += time.perf_counter() - started
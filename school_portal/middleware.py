@@ -0,0 +1,123 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """
+    Record wall time, DB query count and DB time for every request, labelled
+    by view, into ``school_portal.metrics``.
+
+    With ``PERF_PROFILE_SAMPLE_RATE`` > 0 a random sample of requests also
+    runs under cProfile; profiles of requests slower than
+    ``PERF_PROFILE_SLOW_MS`` are written to ``PERF_PROFILE_DIR`` for
+    ``python -m pstats`` / snakeviz. Under ASGI requests interleave on one
+    thread, so profiling is only done for sync requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_PROFILE_SAMPLE_RATE
+        self.slow_seconds = settings.PERF_PROFILE_SLOW_MS / 1000
+        self.profile_dir = settings.PERF_PROFILE_DIR
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        db = {"queries": 0, "seconds": 0.0}
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        try:
+            with metrics.count_queries(db):
+                response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+
+        view = self._record(request, response, elapsed, db)
+        if profiler is not None and elapsed >= self.slow_seconds:
+            self._dump_profile(profiler, view, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        db = {"queries": 0, "seconds": 0.0}
+        started = time.perf_counter()
+        with metrics.count_queries(db):
+            response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, db)
+        return response
+
+    @staticmethod
+    def _record(request, response, elapsed, db):
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or "unresolved"
+        metrics.observe("http_request_duration_seconds", elapsed, view=view, method=request.method,
+                        status=response.status_code)
+        metrics.observe("db_queries_per_request", db["queries"], view=view)
+        metrics.observe("db_time_per_request_seconds", db["seconds"], view=view)
+        return view
+
+    def _start_profiler(self):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            return None
+        return profiler
+
+    def _dump_profile(self, profiler, view, elapsed):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", view)
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{elapsed * 1000:.0f}ms.prof")
+        profiler.dump_stats(path)
+        logger.warning("Slow request to %s took %.0f ms; profile written to %s", view, elapsed * 1000, path)
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise, but also async-capable: with a sync-only middleware in the
+    chain Django would park every ASGI request on a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,140 @@
+"""
+Token-bucket request limits kept in the default cache.
+
+Each protected view has a scope in ``settings.RATE_LIMITS`` mapping the
+identities it is limited by (``ip``, ``session``, ``email``) to a rate
+such as ``"6/m"``: a bucket of 6 tokens per identity, refilled at 6 a
+minute, so a short burst is allowed but not a sustained stream. A request
+needs a token from every one of its buckets.
+
+Buckets live in the cache rather than in process memory so every worker
+(and, with the Redis or file backend, every process on the host) shares
+them. The read-modify-write is not atomic; under a burst from one client
+a few requests more than the limit can get through, which is fine for
+throttling.
+"""
+import hashlib
+import math
+import re
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+CACHE_PREFIX = "ratelimit"
+
+PERIODS = {"s": 1, "m": 60, "h": 3600}
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    period: float  # seconds to refill an empty bucket
+
+    @classmethod
+    def parse(cls, value):
+        """``"10/m"``, ``"100/h"`` or ``"5/30s"``."""
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*([smh])\s*", value)
+        if not match:
+            raise ValueError(f"Invalid rate {value!r}")
+        count, multiple, unit = match.groups()
+        return cls(int(count), int(multiple or 1) * PERIODS[unit])
+
+    @property
+    def per_second(self):
+        return self.capacity / self.period
+
+
+def client_ip(request):
+    """
+    The client address, skipping ``RATELIMIT_PROXY_COUNT`` trusted proxies
+    (e.g. Render's load balancer) at the end of ``X-Forwarded-For``.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [ip.strip() for ip in request.headers.get("X-Forwarded-For", "").split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _session_key(request):
+    session = getattr(request, "session", None)
+    return session.session_key if session is not None else None
+
+
+def _parent_email(request):
+    email = request.POST.get("parent_email") if request.method == "POST" else None
+    if not email and getattr(request, "session", None) is not None:
+        email = (request.session.get("payment_data") or {}).get("parent_email")
+    return email.strip().lower() if email else None
+
+
+IDENTITIES = {
+    "ip": client_ip,
+    "session": _session_key,
+    "email": _parent_email,
+}
+
+
+def take(scope, ident, rate, now=None):
+    """
+    Take one token from ``ident``'s bucket in ``scope``. Returns 0 if one
+    was available, otherwise the seconds until the next token.
+    """
+    now = time.time() if now is None else now
+    key = f"{CACHE_PREFIX}:{scope}:{hashlib.sha256(str(ident).encode()).hexdigest()[:32]}"
+    tokens, stamp = cache.get(key) or (rate.capacity, now)
+    tokens = min(rate.capacity, tokens + (now - stamp) * rate.per_second)
+    if tokens < 1:
+        return (1 - tokens) / rate.per_second
+    # An untouched bucket is full again after one period, so it may simply expire.
+    cache.set(key, (tokens - 1, now), math.ceil(rate.period) + 1)
+    return 0
+
+
+def check(request, scope):
+    """Charge ``request`` to every bucket of ``scope``; return the longest wait, or 0."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0
+    wait = 0
+    for identity, rate in settings.RATE_LIMITS.get(scope, {}).items():
+        ident = IDENTITIES[identity](request)
+        if ident:
+            wait = max(wait, take(f"{scope}:{identity}", ident, Rate.parse(rate)))
+    return wait
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, "error.html", {
+        "title": "Too Many Requests",
+        "message": "You are going a little too fast. Please wait a moment and try again.",
+    }, status=429)
+    response["Retry-After"] = str(math.ceil(retry_after))
+    return response
+
+
+def ratelimit(scope):
+    """Limit a (sync or async) view by the buckets configured for ``scope`` in ``RATE_LIMITS``."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                # Session and cache reads are sync I/O
+                wait = await sync_to_async(check)(request, scope)
+                if wait:
+                    return too_many_requests(request, wait)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapped(request, *args, **kwargs):
+                wait = check(request, scope)
+                if wait:
+                    return too_many_requests(request, wait)
+                return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
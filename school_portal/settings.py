@@ -30,14 +30,19 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'payments',
+    'accounts',
+    'students',
+    'school_portal',  # ✅ site-wide signals and management commands
 ]
 
 # ===========================
 # MIDDLEWARE
 # ===========================
 MIDDLEWARE = [
+    'school_portal.middleware.PerformanceMiddleware',  # ✅ per-view timings for /metrics/
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # ✅ Add this line
+    'school_portal.middleware.WhiteNoiseMiddleware',  # ✅ WhiteNoise that also runs natively under ASGI
+    'django.middleware.http.ConditionalGetMiddleware',  # ✅ ETag / 304 for cached public pages
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,8 +77,9 @@ if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
-            ssl_require=True  # ✅ Required for secure PostgreSQL connections on Render
+            conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "600")),
+            conn_health_checks=True,
+            ssl_require=not DATABASE_URL.startswith("sqlite")  # ✅ Required for secure PostgreSQL connections on Render
         )
     }
 else:
@@ -84,13 +90,115 @@ else:
         }
     }
 
+_db = DATABASES['default']
+if _db['ENGINE'] == 'django.db.backends.postgresql' and os.getenv("DB_POOL", "True").lower() == "true":
+    # ✅ psycopg connection pool shared by all threads of a worker process (replaces
+    # persistent per-thread connections, so CONN_MAX_AGE must be 0)
+    from psycopg_pool import ConnectionPool
+
+    _db['CONN_MAX_AGE'] = 0
+    _db['CONN_HEALTH_CHECKS'] = False
+    _db.setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        'timeout': float(os.getenv("DB_POOL_TIMEOUT", "10")),  # seconds to wait for a free connection
+        'max_idle': float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        'check': ConnectionPool.check_connection,  # health check before handing a connection out
+    }
+elif _db['ENGINE'] == 'django.db.backends.sqlite3':
+    # ✅ WAL lets readers run alongside the writer; IMMEDIATE transactions make writers
+    # queue on the busy timeout instead of failing with "database is locked"
+    _db.setdefault('OPTIONS', {}).update({
+        'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': float(os.getenv("SQLITE_TIMEOUT", "20")),
+    })
+
+# ===========================
+# CACHE CONFIGURATION
+# ===========================
+# CACHE_BACKEND=redis (default when REDIS_URL is set) | file | locmem.
+# Sessions, rate-limit buckets, cached pages and invalidations all live here, so the
+# cache must be shared by every worker and cheap to write. Production requires Redis:
+# FileBasedCache lists its whole directory on every set and culls live rate-limit
+# buckets at random once full, and locmem is private to one process. Both are for
+# development only (file shares state between runserver's reloads and workers).
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "file").lower()
+if not DEBUG and CACHE_BACKEND != "redis":
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured("Set REDIS_URL (CACHE_BACKEND=redis) when DEBUG is off.")
+
+if CACHE_BACKEND == "redis":
+    _cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"),
+    }
+elif CACHE_BACKEND == "file":
+    _cache = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("CACHE_DIR", str(BASE_DIR / "cache")),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("CACHE_MAX_ENTRIES", "20000"))},
+    }
+else:
+    _cache = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'school-portal',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("CACHE_MAX_ENTRIES", "20000"))},
+    }
+
+CACHES = {
+    'default': {
+        **_cache,
+        'TIMEOUT': int(os.getenv("CACHE_TIMEOUT", "300")),
+        'KEY_PREFIX': 'portal',
+    }
+}
+
+# Test runs swap in a private in-memory cache (see school_portal/test_runner.py)
+TEST_RUNNER = 'school_portal.test_runner.TestRunner'
+
+# Anonymous-safe public pages (home/about/contact) are served from the page cache
+PUBLIC_PAGE_CACHE_SECONDS = int(os.getenv("PUBLIC_PAGE_CACHE_SECONDS", "600"))
+
+# ===========================
+# SESSIONS
+# ===========================
+# cached_db (default): reads come from the cache, the DB is only the durable copy.
+# With a per-process locmem cache that copy would go stale across workers, so the
+# default falls back to plain db sessions there.
+# signed_cookies: no server-side storage at all (data is signed, not encrypted).
+SESSION_ENGINE = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}[os.getenv("SESSION_STORE", "db" if CACHE_BACKEND == "locmem" else "cached_db")]
+SESSION_COOKIE_AGE = int(os.getenv("SESSION_COOKIE_AGE", str(60 * 60 * 24)))  # the payment wizard needs hours, not weeks
+
 # ===========================
 # STATIC FILES CONFIGURATION
 # ===========================
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# 🚫 Remove STATICFILES_DIRS entirely — Django will auto-discover
+# ✅ The project-level static/ folder is not inside an app, so it must be listed here
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# ✅ Hashed, gzip/brotli-precompressed files in production; WhiteNoise serves them
+# with far-future "immutable" caching. Plain storage in DEBUG so no manifest is needed.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# `python manage.py build_assets` compiles Tailwind into TAILWIND_OUTPUT; base.html
+# uses it instead of the Play CDN once it exists (or when forced on/off here).
+TAILWIND_CLI = os.getenv("TAILWIND_CLI", "tailwindcss")
+TAILWIND_OUTPUT = BASE_DIR / 'static' / 'css' / 'tailwind.min.css'
+USE_COMPILED_TAILWIND = os.getenv("USE_COMPILED_TAILWIND", str(TAILWIND_OUTPUT.exists())).lower() == 'true'
 
 # ===========================
 # TEMPLATES CONFIGURATION
@@ -99,13 +207,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # ✅ Always use the cached loader; runserver's autoreloader still clears it on template edits
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'school_portal.context_processors.assets',
             ],
         },
     },
@@ -117,6 +232,67 @@ TEMPLATES = [
 FLW_PUBLIC_KEY = os.getenv("FLW_PUBLIC_KEY")
 FLW_SECRET_KEY = os.getenv("FLW_SECRET_KEY")
 FLW_BASE_URL = os.getenv("FLW_BASE_URL", "https://api.flutterwave.com/v3")
+FLW_SECRET_HASH = os.getenv("FLW_SECRET_HASH")  # Webhook signing secret (dashboard > Settings > Webhooks)
+
+# Gateway client: connection pool, timeouts (seconds), verify retries, circuit breaker
+FLW_CONNECT_TIMEOUT = float(os.getenv("FLW_CONNECT_TIMEOUT", "3.05"))
+FLW_READ_TIMEOUT = float(os.getenv("FLW_READ_TIMEOUT", "6"))
+FLW_POOL_MAXSIZE = int(os.getenv("FLW_POOL_MAXSIZE", "10"))
+FLW_VERIFY_RETRIES = int(os.getenv("FLW_VERIFY_RETRIES", "2"))
+FLW_BACKOFF_BASE = float(os.getenv("FLW_BACKOFF_BASE", "0.25"))
+FLW_BACKOFF_MAX = float(os.getenv("FLW_BACKOFF_MAX", "2"))
+FLW_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("FLW_CIRCUIT_FAILURE_THRESHOLD", "5"))
+FLW_CIRCUIT_RESET_TIMEOUT = float(os.getenv("FLW_CIRCUIT_RESET_TIMEOUT", "30"))
+
+# ✅ Async initialize/verify views (set by school_portal/asgi.py); one event loop holds
+# up to FLW_ASYNC_MAX_CONNECTIONS gateway calls at once
+ASYNC_PAYMENT_VIEWS = os.getenv("ASYNC_PAYMENT_VIEWS", "False").lower() == "true"
+FLW_ASYNC_MAX_CONNECTIONS = int(os.getenv("FLW_ASYNC_MAX_CONNECTIONS", "200"))
+
+# ✅ Admission control: gateway calls in flight across all workers, counted in the shared
+# cache (0 = no cap); calls over the cap get an immediate 503 "try again" page with
+# Retry-After instead of queuing
+FLW_MAX_IN_FLIGHT = int(os.getenv("FLW_MAX_IN_FLIGHT", "50"))
+FLW_BUSY_RETRY_AFTER = int(os.getenv("FLW_BUSY_RETRY_AFTER", "5"))  # seconds
+
+# ===========================
+# PERFORMANCE METRICS
+# ===========================
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Bearer token for scraping /metrics/ without a staff login
+PERF_PROFILE_SAMPLE_RATE = float(os.getenv("PERF_PROFILE_SAMPLE_RATE", "0"))  # e.g. 0.01 = profile 1% of requests
+PERF_PROFILE_SLOW_MS = float(os.getenv("PERF_PROFILE_SLOW_MS", "500"))  # only keep profiles slower than this
+PERF_PROFILE_DIR = os.getenv("PERF_PROFILE_DIR", str(BASE_DIR / "profiles"))
+
+# ===========================
+# RECEIPT PDF CACHE
+# ===========================
+RECEIPT_CACHE_DIR = os.getenv("RECEIPT_CACHE_DIR", str(BASE_DIR / "receipt_cache"))
+RECEIPT_CACHE_MAX_BYTES = int(os.getenv("RECEIPT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# ===========================
+# RECEIPT VERIFICATION (QR codes)
+# ===========================
+SITE_URL = os.getenv("SITE_URL", "https://school-payment-portal.onrender.com")  # public origin printed in QR codes
+RECEIPT_VERIFY_CACHE_SECONDS = int(os.getenv("RECEIPT_VERIFY_CACHE_SECONDS", "3600"))
+
+# ===========================
+# RATE LIMITING
+# ===========================
+# Token buckets in the cache (see school_portal/ratelimit.py): per view scope, each
+# identity gets "<burst>/<period>" tokens, refilled evenly over the period. Use a
+# shared cache (redis/file) so all workers see the same buckets.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+RATE_LIMITS = {
+    "pay": {"ip": "60/m", "session": "20/m"},
+    "initialize": {"ip": "10/m", "session": "5/m", "email": "5/m"},
+    "verify": {"ip": "20/m", "session": "10/m"},
+    "receipt": {"ip": "60/m", "session": "20/m"},
+    "receipt-verify": {"ip": "30/m"},
+}
+# Reverse proxies in front of the app whose X-Forwarded-For entries are trusted. Render's
+# load balancer is one; set 0 only when clients connect to gunicorn directly, since with
+# too few every parent shares the proxy's address (and one per-IP bucket).
+RATELIMIT_PROXY_COUNT = int(os.getenv("RATELIMIT_PROXY_COUNT", "1"))
 
 # ===========================
 # DEFAULT AUTO FIELD
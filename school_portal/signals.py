@@ -0,0 +1,11 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+
+# ✅ Count every connection's queries toward the request being served (see metrics.count_queries)
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if metrics.query_counter not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.query_counter)
@@ -0,0 +1,25 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Cache keys such as ``receipt-verify:<pk>`` are per row and test pks overlap with
+# the dev database's, so a test run must never write into the developer's cache.
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tests",
+        "KEY_PREFIX": "portal",
+    }
+}
+
+
+class TestRunner(DiscoverRunner):
+    """``DiscoverRunner`` with a private in-memory cache for the whole run."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
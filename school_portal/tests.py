@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+
+from . import metrics, ratelimit
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def request(self, client_address):
+        # Render's proxy connects from its own address and appends the client's to X-Forwarded-For
+        return RequestFactory().get("/payments/initialize/", REMOTE_ADDR="10.10.0.1",
+                                    headers={"X-Forwarded-For": client_address})
+
+    def test_clients_behind_the_proxy_get_separate_buckets(self):
+        limit = ratelimit.Rate.parse(settings.RATE_LIMITS["initialize"]["ip"]).capacity
+        for _ in range(limit):
+            self.assertEqual(ratelimit.check(self.request("198.51.100.1"), "initialize"), 0)
+
+        self.assertGreater(ratelimit.check(self.request("198.51.100.1"), "initialize"), 0)
+        self.assertEqual(ratelimit.check(self.request("198.51.100.2"), "initialize"), 0)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+
+    def db_queries(self):
+        return sum(h.sum for (name, _), h in metrics.registry._histograms.items() if name == "db_queries_per_request")
+
+    def test_counts_queries_under_wsgi(self):
+        self.client.get("/payments/verify/", {"tx_ref": "SCH-MISSING"})
+        self.assertGreaterEqual(self.db_queries(), 1)
+
+    async def test_counts_queries_under_asgi(self):
+        # The sync view and its queries run in a sync_to_async thread, not the event loop's
+        await self.async_client.get("/payments/verify/", {"tx_ref": "SCH-MISSING"})
+        self.assertGreaterEqual(self.db_queries(), 1)
+
+
+class ContactPageTests(TestCase):
+    def test_cached_page_still_requires_a_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        page = client.get("/contact/")
+        self.assertNotIn("csrftoken", page.cookies)  # shareable by every visitor
+        message = {"name": "Ada", "email": "ada@example.com", "subject": "Hi", "message": "Hello"}
+        self.assertEqual(client.post("/contact/", message).status_code, 403)
+
+        token = client.get("/csrf/").json()["token"]
+        self.assertEqual(client.post("/contact/", {**message, "csrfmiddlewaretoken": token}).status_code, 200)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
+from accounts import views as accounts_views
 from . import views
 
 urlpatterns = [
@@ -8,6 +9,10 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
     path('payments/', include('payments.urls')),
+    path('accounts/', include('accounts.urls')),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
+    path('csrf/', views.csrf_token, name='csrf_token'),  # ✅ uncached CSRF token for cached pages
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('r/<str:token>/', accounts_views.verify_receipt, name='verify_receipt'),  # ✅ short URL in receipt QR codes
 ]
@@ -1,10 +1,37 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+from . import metrics
+from .decorators import public_page
 
+@public_page
 def about(request):
     return render(request, 'about.html')
 
+@public_page
 def home(request):
     return render(request, 'home.html')  # optional if you have a homepage
 
+@public_page  # only GETs are cached; a POST still has to pass the CSRF check
 def contact(request):
     return render(request, 'contact.html')
+
+@never_cache
+def csrf_token(request):
+    # ✅ Per-visitor token for forms on cached pages, fetched by static/js/main.js
+    return JsonResponse({"token": get_token(request)})
+
+def metrics_view(request):
+    # ✅ Staff session, or "Authorization: Bearer <METRICS_TOKEN>" for a Prometheus scraper
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get("Authorization", "")
+    if not (request.user.is_active and request.user.is_staff) and not (
+        token and hmac.compare_digest(bearer, f"Bearer {token}")
+    ):
+        return HttpResponseForbidden("Staff only")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
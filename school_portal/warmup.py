@@ -0,0 +1,60 @@
+"""
+Warm-up run from gunicorn's hooks (see gunicorn.conf.py): ``when_ready`` in
+the master when the app is preloaded (no database connection, since that
+must not be shared with the forks) and ``post_worker_init`` in each worker.
+
+Django fills several caches lazily on the first request a process serves:
+the URL resolver, the cached template loader and the database connection.
+Doing that before the worker accepts requests means a freshly started or
+scaled-up worker does not make its first visitor wait for it.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def template_names():
+    """Every ``.html`` template of the project itself (not Django's admin)."""
+    dirs = [Path(d) for d in settings.TEMPLATES[0]["DIRS"]]
+    dirs += [Path(app.path) / "templates" for app in apps.get_app_configs() if not app.name.startswith("django.")]
+    names = set()
+    for directory in dirs:
+        names.update(path.relative_to(directory).as_posix() for path in directory.rglob("*.html"))
+    return sorted(names)
+
+
+def warm_up(connect=True):
+    """Populate the URL resolver and template cache and (optionally) open the DB connection."""
+    timings = {}
+
+    started = time.perf_counter()
+    get_resolver().reverse_dict  # imports every urls/views module and builds the lookup tables
+    timings["urls"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name in template_names():
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            # e.g. admin overrides that only resolve in context; they load on first use
+            continue
+    timings["templates"] = time.perf_counter() - started
+
+    if connect:
+        started = time.perf_counter()
+        try:
+            connections["default"].ensure_connection()
+        except Exception:
+            logger.exception("Warm-up could not connect to the database; the first request will retry")
+        timings["db"] = time.perf_counter() - started
+
+    return timings
@@ -0,0 +1,13 @@
+// Forms on cached public pages cannot carry a CSRF token (it is per visitor), so
+// they name an uncached endpoint in data-csrf-url and get their token from it.
+document.querySelectorAll("form[data-csrf-url]").forEach(function (form) {
+  fetch(form.dataset.csrfUrl, { credentials: "same-origin" })
+    .then(function (response) { return response.json(); })
+    .then(function (data) {
+      var input = document.createElement("input");
+      input.type = "hidden";
+      input.name = "csrfmiddlewaretoken";
+      input.value = data.token;
+      form.appendChild(input);
+    });
+});
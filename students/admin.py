@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Student
+
+
+@admin.register(Student)
+class StudentAdmin(admin.ModelAdmin):
+    list_display = ("admission_number", "name", "student_class", "session", "parent_email")
+    list_filter = ("session", "student_class")
+    search_fields = ("=admission_number", "name", "parent_email")
+    list_per_page = 50
+    show_full_result_count = False
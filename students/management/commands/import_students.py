@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students import roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a roster CSV (admission_number, name, class[, session, parent_email]) into Student. "
+        "The file is streamed and upserted in batches, so re-importing an updated roster is safe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster CSV file.")
+        parser.add_argument("--session", default="", help="Session for rows without a session column.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--link-payments", action="store_true", help="Run link_student_payments afterwards.")
+
+    def handle(self, *args, **options):
+        skipped_lines = []
+        try:
+            with open(options["path"], newline="", encoding=options["encoding"]) as fh:
+                students = roster.read_roster(fh, default_session=options["session"], errors=skipped_lines)
+                result = roster.upsert_students(students, batch_size=options["batch_size"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {result.written} student(s) from {result.rows} row(s) in {result.elapsed:.1f}s "
+            f"({result.rows / result.elapsed if result.elapsed else 0:,.0f} rows/s)."
+        ))
+        if skipped_lines:
+            preview = ", ".join(map(str, skipped_lines[:10])) + (" ..." if len(skipped_lines) > 10 else "")
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(skipped_lines)} row(s) without admission number or name (lines {preview})."
+            ))
+
+        if options["link_payments"]:
+            linked, unmatched = roster.link_payments()
+            self.stdout.write(f"Linked {linked} payment(s); {unmatched} still unmatched.")
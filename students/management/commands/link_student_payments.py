@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from students import roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Link payments that have no student to the roster by student name, class and session. "
+        "Safe to re-run; names matching more than one student are left unlinked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        linked, unmatched = roster.link_payments(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Linked {linked} payment(s) in {time.perf_counter() - started:.1f}s; {unmatched} still unmatched."
+        ))
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class Student(models.Model):
+    # ✅ School roster, loaded in bulk by `manage.py import_students`
+    admission_number = models.CharField(max_length=30, unique=True)
+    name = models.CharField(max_length=255)
+    student_class = models.CharField(max_length=100)
+    session = models.CharField(max_length=20)
+    parent_email = models.EmailField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["student_class", "name"]
+        indexes = [
+            # Class lists per session, and matching payments (name/class/session) to students
+            models.Index(fields=["session", "student_class", "name"], name="student_sess_cls_name_idx"),
+            models.Index(fields=["name"], name="student_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.admission_number})"
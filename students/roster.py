@@ -0,0 +1,130 @@
+"""
+Bulk roster loading and payment linking for ``Student``.
+
+``read_roster`` streams a CSV one row at a time, ``upsert_students`` writes
+them in batches with a single ``INSERT ... ON CONFLICT DO UPDATE`` per
+batch, and ``link_payments`` attaches unlinked payments to students by
+(name, class, session) without loading either table row by row.
+"""
+import csv
+import re
+import time
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from .models import Student
+
+# Accepted header spellings for each field, lower-cased.
+COLUMNS = {
+    "admission_number": ("admission_number", "admission_no", "admission number", "admission no", "adm_no"),
+    "name": ("name", "student_name", "full_name", "student name"),
+    "student_class": ("student_class", "class"),
+    "session": ("session",),
+    "parent_email": ("parent_email", "email", "parent email"),
+}
+UPDATE_FIELDS = ["name", "student_class", "session", "parent_email", "updated_at"]
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    written: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+
+def normalize_name(name):
+    """Case- and spacing-insensitive form of a student name, for matching."""
+    return re.sub(r"\s+", " ", (name or "").strip()).casefold()
+
+
+def read_roster(fileobj, default_session="", errors=None):
+    """Yield unsaved ``Student`` objects from a CSV; rows without admission number or name are skipped."""
+    reader = csv.DictReader(fileobj)
+    headers = {(h or "").strip().lower(): h for h in reader.fieldnames or []}
+    mapping = {}
+    for field, names in COLUMNS.items():
+        mapping[field] = next((headers[n] for n in names if n in headers), None)
+    missing = [f for f in ("admission_number", "name", "student_class") if mapping[f] is None]
+    if missing:
+        raise ValueError(f"Roster CSV is missing column(s): {', '.join(missing)}")
+
+    for line, row in enumerate(reader, start=2):
+        values = {field: (row.get(column) or "").strip() if column else "" for field, column in mapping.items()}
+        if not values["admission_number"] or not values["name"]:
+            if errors is not None:
+                errors.append(line)
+            continue
+        values["session"] = values["session"] or default_session
+        yield Student(**values)
+
+
+def upsert_students(students, batch_size=2000):
+    """Insert or update ``students`` (any iterable) in batches, keyed on admission number."""
+    result = ImportResult()
+    started = time.perf_counter()
+    batch = {}
+    for student in students:
+        result.rows += 1
+        # One statement cannot update the same row twice: the last occurrence wins.
+        batch[student.admission_number] = student
+        if len(batch) >= batch_size:
+            result.written += _write(batch)
+            batch = {}
+    if batch:
+        result.written += _write(batch)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _write(batch):
+    with transaction.atomic():
+        Student.objects.bulk_create(
+            batch.values(),
+            update_conflicts=True,
+            unique_fields=["admission_number"],
+            update_fields=UPDATE_FIELDS,
+        )
+    return len(batch)
+
+
+def link_payments(batch_size=5000):
+    """
+    Point payments with no student at the student with the same
+    (normalized name, class, session). Ambiguous matches are left alone.
+    Returns ``(linked, unmatched)``.
+    """
+    from payments.models import Payment
+
+    index = {}
+    for pk, name, student_class, session in Student.objects.values_list(
+        "pk", "name", "student_class", "session"
+    ).iterator(chunk_size=batch_size):
+        key = (normalize_name(name), student_class.strip(), session.strip())
+        index[key] = None if key in index else pk  # two students with one key: ambiguous
+
+    linked = unmatched = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Payment.objects.filter(student__isnull=True, pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "student_name", "student_class", "session")[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        updates = []
+        for pk, name, student_class, session in rows:
+            student_id = index.get((normalize_name(name), (student_class or "").strip(), (session or "").strip()))
+            if student_id is None:
+                unmatched += 1
+            else:
+                updates.append(Payment(pk=pk, student_id=student_id))
+        if updates:
+            # bulk_update skips save() and its signals; only the FK changes.
+            Payment.objects.bulk_update(updates, ["student"], batch_size=batch_size)
+            linked += len(updates)
+    return linked, unmatched
@@ -0,0 +1,12 @@
+/** Used by `python manage.py build_assets` (Tailwind CLI v3). */
+module.exports = {
+  content: [
+    './templates/**/*.html',
+    './*/templates/**/*.html',
+    './static/js/**/*.js',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};